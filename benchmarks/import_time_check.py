@@ -0,0 +1,91 @@
+'''
+Import-time budget check for the Streamlit entry points.
+
+Imports each entry point in a fresh interpreter under `python -X importtime`, with a throwaway
+Streamlit secrets file, and reports the median import time and the slowest packages. Fails when
+an entry point is over budget or loads one of the heavy dependencies at startup.
+
+usage: python benchmarks/import_time_check.py [--module final_jobfusion_app2] [--budget-ms 1500] [--repeat 3]
+'''
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must only load when the tab or crew that needs them is first used
+HEAVY_PACKAGES = ['crewai', 'crewai_tools', 'embedchain', 'chromadb', 'langchain', 'langchain_community',
+                  'langchain_core', 'langchain_openai', 'openai', 'faiss', 'torch', 'sentence_transformers', 'transformers']
+
+
+def parse_importtime(stderr):
+    '''
+    (depth, package, self us, cumulative us) for every line of -X importtime output
+    '''
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def import_once(module, secrets_dir):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=secrets_dir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{result.stderr[-2000:]}')
+    return parse_importtime(result.stderr)
+
+
+def check_module(module, budget_ms, repeat, top, secrets_dir):
+    runs = [import_once(module, secrets_dir) for _ in range(repeat)]
+    totals = [next(cumulative for _, name, _, cumulative in entries if name == module) / 1000 for entries in runs]
+    total_ms = statistics.median(totals)
+
+    # Self time per root package, from the median run
+    entries = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    per_package = defaultdict(int)
+    for _, name, self_us, _ in entries:
+        per_package[name.split('.')[0]] += self_us
+    heavy = sorted({name.split('.')[0] for _, name, _, _ in entries} & set(HEAVY_PACKAGES))
+
+    print(f'\n{module}: {total_ms:.0f} ms (median of {repeat}, budget {budget_ms:.0f} ms)')
+    for package, self_us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f'  {self_us / 1000:8.1f} ms  {package}')
+    if heavy:
+        print(f'  heavy packages imported at startup: {", ".join(heavy)}')
+
+    ok = total_ms <= budget_ms and not heavy
+    print(f'  {"PASS" if ok else "FAIL"}')
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import time of the Streamlit entry points against a budget.')
+    parser.add_argument('--module', action='append', help='module to import (repeatable), default final_jobfusion_app2')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('JOBFUSION_IMPORT_BUDGET_MS', 1500)))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help='number of slowest packages to list')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as secrets_dir:
+        # st.secrets is read at import time, so give it a dummy key
+        os.makedirs(os.path.join(secrets_dir, '.streamlit'))
+        with open(os.path.join(secrets_dir, '.streamlit', 'secrets.toml'), 'w') as f:
+            f.write('OPENAI_API_KEY = "sk-import-time-check"\n')
+        results = [check_module(module, args.budget_ms, args.repeat, args.top, secrets_dir)
+                   for module in args.module or ['final_jobfusion_app2']]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+'''
+Offline end-to-end benchmarks for the JobFusion pipelines.
+
+Starts the stub OpenAI server (benchmarks/stub_openai_server.py), points every OpenAI client at it
+and runs each scenario a few times in a scratch working directory:
+
+  build_docs             JobFusionCrew.run on the sample resume/writeup and the mock job posting
+  edit_docs              JobFusionCrew2.run on the Build Docs outputs
+  career_chat            one Career Chat turn through get_qa_chain
+  course_recommendation  CourseRecommendation.run on the fixture course inventory
+  course_extraction      DLCourseRecCrew.run on the mock deeplearning.ai course page
+
+For each scenario it reports the cold (first) run and p50/p95 wall time, and the LLM calls,
+embedding calls and prompt tokens per run as counted by the stub. The LLM response cache is off
+unless --llm-cache is given, so every run makes its real calls.
+
+Needs the packages in requirements.txt, plus tiktoken's cl100k_base encoding and the cross-encoder
+reranker weights in their local caches (TIKTOKEN_CACHE_DIR / HF_HOME), since nothing is downloaded.
+
+usage: python benchmarks/run_benchmarks.py [--scenario build_docs ...] [--iterations 3] [--json results.json]
+'''
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from stub_openai_server import StubConfig, start_server
+
+SCENARIOS = ['build_docs', 'edit_docs', 'career_chat', 'course_recommendation', 'course_extraction']
+RESUME_PATH = os.path.join('inputs', 'resume_AI.docx')
+PERSONAL_WRITEUP_PATH = os.path.join('inputs', 'skills_profile.docx')
+USERS_FEEDBACK = {
+    'missing_info': 'My NLP project on customer support ticket routing is missing.',
+    'new_additions': 'Add the RAG prototype I built last quarter.',
+    'correct_inaccuracies': 'I led the team of three, I did not manage a department.',
+    'general_suggestions': 'Keep the resume to one page.',
+}
+
+
+def percentile(values, q):
+    '''
+    Linear-interpolated percentile of a small sample
+    '''
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def prepare_workdir(base_url, llm_cache):
+    '''
+    Scratch working directory with the sample inputs and a dummy Streamlit secrets file, and the OpenAI env pointed at the stub
+    '''
+    workdir = tempfile.mkdtemp(prefix='jobfusion-bench-')
+    shutil.copytree(os.path.join(REPO_DIR, 'inputs'), os.path.join(workdir, 'inputs'))
+    os.makedirs(os.path.join(workdir, '.streamlit'))
+    with open(os.path.join(workdir, '.streamlit', 'secrets.toml'), 'w') as f:
+        f.write('OPENAI_API_KEY = "sk-benchmark"\n')
+    os.chdir(workdir)
+
+    os.environ.update({
+        'OPENAI_API_KEY': 'sk-benchmark',
+        'OPENAI_API_BASE': base_url,
+        'OPENAI_BASE_URL': base_url,
+        'JOBFUSION_LLM_CACHE': '1' if llm_cache else '0',
+        'HF_HUB_OFFLINE': '1',
+        'TRANSFORMERS_OFFLINE': '1',
+        'OTEL_SDK_DISABLED': 'true',
+        'NO_PROXY': '127.0.0.1,localhost',
+    })
+    return workdir
+
+
+class Scenarios():
+    def __init__(self, site_url, workspace_dir):
+        self.site_url = site_url
+        self.jd_url = f'{site_url}/job_posting.html'
+        self.workspace_dir = workspace_dir
+        os.makedirs(workspace_dir, exist_ok=True)
+
+    def build_docs(self):
+        from final_jobfusion_app2 import JobFusionCrew
+        JobFusionCrew(RESUME_PATH, PERSONAL_WRITEUP_PATH, self.jd_url, self.workspace_dir).run()
+
+    def ensure_build_outputs(self):
+        if not os.path.exists(os.path.join(self.workspace_dir, 'updated_resume.md')):
+            self.build_docs()
+
+    def edit_docs(self):
+        from final_jobfusion_app2 import JobFusionCrew2
+        JobFusionCrew2(RESUME_PATH, PERSONAL_WRITEUP_PATH, os.path.join(self.workspace_dir, 'updated_resume.md'),
+                       os.path.join(self.workspace_dir, 'jd.txt'), USERS_FEEDBACK, self.workspace_dir).run()
+
+    def career_chat(self):
+        from mock_interview_chatbot import build_vectordb, file_loading, get_qa_chain, new_chat_memory, openai_api_key
+        from tools.document_ingestion import parse_document
+        db = build_vectordb(file_loading('inputs/contents/'))
+        chat_history = new_chat_memory()
+        qa_chain = get_qa_chain(db, k=3, chain_type='stuff', user_resume=parse_document(RESUME_PATH),
+                                user_personal_writeup=parse_document(PERSONAL_WRITEUP_PATH),
+                                job_qualifications=[open(os.path.join(self.workspace_dir, 'jd.txt'), encoding='utf-8').read()],
+                                openai_api_key=openai_api_key, chat_history=chat_history)
+        qa_chain.run({'question': 'How should I prepare for the system design interview?',
+                      'chat_history': chat_history.as_chat_history()})
+
+    def course_recommendation(self):
+        from tools.course_recommendation import CourseRecommendation
+        os.makedirs('output', exist_ok=True)
+        CourseRecommendation().run(file_path=os.path.join(FIXTURES_DIR, 'course_inventory.csv'),
+                                   user_profile_path=os.path.join(FIXTURES_DIR, 'user_profile.csv'))
+
+    def course_extraction(self):
+        from tools.dl_course_inventory import DLCourseRecCrew
+        DLCourseRecCrew(f'{self.site_url}/dl_short_course.html', 'Short Course').run()
+
+
+def stats_delta(before, after):
+    return {name: after[name] - before[name] for name in after}
+
+
+def run_scenario(name, scenarios, stats, iterations):
+    # Edit Docs and Career Chat read the Build Docs outputs, which are produced once outside the timings
+    if name in ('edit_docs', 'career_chat'):
+        scenarios.ensure_build_outputs()
+
+    runs = []
+    for i in range(iterations):
+        before = stats.snapshot()
+        start = time.perf_counter()
+        getattr(scenarios, name)()
+        runs.append(dict(stats_delta(before, stats.snapshot()), seconds=time.perf_counter() - start))
+        print(f'{name} run {i + 1}/{iterations}: {runs[-1]["seconds"]:.2f}s, {runs[-1]["chat_calls"]} LLM calls')
+
+    seconds = [run['seconds'] for run in runs]
+    return {
+        'runs': len(runs),
+        'cold_s': seconds[0],
+        'p50_s': percentile(seconds, 50),
+        'p95_s': percentile(seconds, 95),
+        'llm_calls': sum(run['chat_calls'] for run in runs) / len(runs),
+        'embedding_calls': sum(run['embedding_calls'] for run in runs) / len(runs),
+        'prompt_tokens': sum(run['prompt_tokens'] for run in runs) / len(runs),
+        'completion_tokens': sum(run['completion_tokens'] for run in runs) / len(runs),
+    }
+
+
+def print_report(results):
+    header = f'{"scenario":<24}{"runs":>5}{"cold s":>9}{"p50 s":>9}{"p95 s":>9}{"LLM calls":>11}{"embed calls":>13}{"prompt tok":>12}'
+    print('\n' + header)
+    print('-' * len(header))
+    for name, result in results.items():
+        if 'error' in result:
+            print(f'{name:<24}  FAILED: {result["error"]}')
+            continue
+        print(f'{name:<24}{result["runs"]:>5}{result["cold_s"]:>9.2f}{result["p50_s"]:>9.2f}{result["p95_s"]:>9.2f}'
+              f'{result["llm_calls"]:>11.1f}{result["embedding_calls"]:>13.1f}{result["prompt_tokens"]:>12.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the offline end-to-end benchmarks against the stub OpenAI server.')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='scenario to run (repeatable), default all')
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=200, help='stub time to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=200, help='stub generation speed')
+    parser.add_argument('--completion-tokens', type=int, default=200, help='length of stub answers')
+    parser.add_argument('--embedding-latency-ms', type=float, default=50)
+    parser.add_argument('--llm-cache', action='store_true', help='keep the local LLM response cache on')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    parser.add_argument('--keep-workdir', action='store_true')
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    config = StubConfig(args.latency_ms, args.tokens_per_second, args.completion_tokens, args.embedding_latency_ms)
+    server, stats = start_server(config)
+    stub_url = f'http://127.0.0.1:{server.server_port}'
+    workdir = prepare_workdir(stub_url + '/v1', args.llm_cache)
+    print(f'Stub server at {stub_url}, working directory {workdir}')
+
+    scenarios = Scenarios(stub_url + '/sites', os.path.join(workdir, 'output', 'workspaces', 'benchmark'))
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        try:
+            results[name] = run_scenario(name, scenarios, stats, args.iterations)
+        except Exception as e:
+            traceback.print_exc()
+            results[name] = {'error': f'{type(e).__name__}: {e}'}
+
+    print_report(results)
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+    server.shutdown()
+    os.chdir(REPO_DIR)
+    if not args.keep_workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if any('error' in result for result in results.values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+'''
+Local OpenAI-compatible stub server for offline benchmarks.
+
+Serves /v1/chat/completions (plain and SSE streaming) and /v1/embeddings with a configurable
+time-to-first-token and generation speed, plus the HTML/CSV fixtures under /sites/ as mock job and
+course pages. GET /stats returns call and token counters; POST /stats/reset clears them.
+
+Chat replies follow crewai's ReAct format: an agent that has tools calls one of them once, then
+gives a Final Answer. Prompts asking for the course recommendation JSON get JSON built from the
+courses in the prompt. Embeddings are deterministic hashed bag-of-words vectors, so retrieval
+still ranks overlapping text first.
+
+usage: python benchmarks/stub_openai_server.py [--port 8765] [--latency-ms 200] [--tokens-per-second 200]
+'''
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+TOOL_CALL_MARKER = 'Thought: (stub) I should gather the relevant details with a tool first.'
+CHARS_PER_TOKEN = 4
+FILLER_WORDS = ('candidate experience skills project impact team model data pipeline python machine learning '
+                'stakeholders delivered improved analysis results customers production evaluation metrics').split()
+
+
+class StubConfig():
+    def __init__(self, latency_ms=200, tokens_per_second=200, completion_tokens=200,
+                 embedding_latency_ms=50, embedding_dim=1536):
+        self.latency = latency_ms / 1000
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.embedding_latency = embedding_latency_ms / 1000
+        self.embedding_dim = embedding_dim
+
+
+class StubStats():
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {'chat_calls': 0, 'chat_stream_calls': 0, 'embedding_calls': 0, 'embedded_inputs': 0,
+                             'prompt_tokens': 0, 'completion_tokens': 0, 'embedding_tokens': 0, 'site_requests': 0}
+
+    def add(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self.counters[name] += count
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+def count_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def prompt_text(body):
+    return '\n'.join(message['content'] if isinstance(message.get('content'), str) else json.dumps(message.get('content'))
+                     for message in body.get('messages', []))
+
+
+def filler_text(seed, tokens):
+    digest = hashlib.sha256(seed.encode('utf-8')).digest()
+    words = [FILLER_WORDS[(digest[i % len(digest)] + i) % len(FILLER_WORDS)] for i in range(tokens)]
+    sentences = [' '.join(words[i:i + 12]).capitalize() + '.' for i in range(0, len(words), 12)]
+    return '\n'.join(f'- {sentence}' for sentence in sentences)
+
+
+def recommendation_json(prompt):
+    '''
+    The course recommendation answer, built from the "Title: ..." rows of the course inventory in the prompt
+    '''
+    courses = []
+    for block in re.split(r'\n\s*\n', prompt):
+        fields = dict(re.findall(r'^\s*(Title|Category|URL|Level): (.*)$', block, flags=re.MULTILINE))
+        if 'Title' in fields:
+            courses.append({'title': fields['Title'], 'category': fields.get('Category', ''), 'URL': fields.get('URL', ''),
+                            'level': fields.get('Level', ''), 'reasons': 'Matches the skills the user wants to learn.'})
+    return json.dumps({'recommended_courses': courses[:10] or [{'title': 'n/a', 'category': '', 'URL': '', 'level': '', 'reasons': ''}]})
+
+
+def tool_input(tool_name):
+    if 'search' in tool_name.lower():
+        return json.dumps({'search_query': 'skills and project experience'})
+    return json.dumps({})
+
+
+def chat_reply(prompt, config):
+    '''
+    The assistant text for a chat prompt
+    '''
+    if "'title', 'category', 'URL', 'level', 'reasons'" in prompt:
+        return recommendation_json(prompt)
+
+    body = filler_text(prompt[-2000:], config.completion_tokens)
+    tools = re.search(r'only one name of \[(.*?)\]', prompt)
+    if 'Final Answer' not in prompt:
+        return body
+    if tools and tools.group(1).strip() and TOOL_CALL_MARKER not in prompt:
+        tool_name = tools.group(1).split(',')[0].strip()
+        return f'{TOOL_CALL_MARKER}\nAction: {tool_name}\nAction Input: {tool_input(tool_name)}'
+    return f'Thought: I now know the final answer\nFinal Answer: {body}'
+
+
+def embedding(text, dim):
+    '''
+    Normalized hashed bag-of-words vector; token-id lists are hashed per id
+    '''
+    vector = [0.0] * dim
+    tokens = re.findall(r'\w+', text.lower()) if isinstance(text, str) else [str(token) for token in text]
+    for token in tokens or ['']:
+        digest = hashlib.md5(token.encode('utf-8')).digest()
+        index = int.from_bytes(digest[:4], 'little') % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = None
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path == '/stats':
+            return self.send_json(self.stats.snapshot())
+        if self.path.startswith('/sites/'):
+            return self.serve_fixture(self.path[len('/sites/'):].split('?')[0])
+        self.send_json({'error': {'message': f'Unknown path {self.path}'}}, status=404)
+
+    def do_POST(self):
+        if self.path == '/stats/reset':
+            self.stats.reset()
+            return self.send_json({'ok': True})
+        body = self.read_json()
+        if self.path.endswith('/chat/completions'):
+            return self.chat_completions(body)
+        if self.path.endswith('/embeddings'):
+            return self.embeddings(body)
+        self.send_json({'error': {'message': f'Unknown path {self.path}'}}, status=404)
+
+    def serve_fixture(self, name):
+        path = os.path.join(FIXTURES_DIR, os.path.basename(name))
+        if not os.path.isfile(path):
+            return self.send_json({'error': {'message': f'No fixture {name}'}}, status=404)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.stats.add(site_requests=1)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8' if path.endswith('.html') else 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def chat_completions(self, body):
+        prompt = prompt_text(body)
+        reply = chat_reply(prompt, self.config)
+        if body.get('stop'):
+            for stop in body['stop']:
+                reply = reply.split(stop)[0]
+        prompt_tokens, completion_tokens = count_tokens(prompt), count_tokens(reply)
+        self.stats.add(chat_calls=1, chat_stream_calls=int(bool(body.get('stream'))),
+                       prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+        completion_id, created, model = f'chatcmpl-{uuid.uuid4().hex}', int(time.time()), body.get('model', 'stub')
+        time.sleep(self.config.latency)
+        if not body.get('stream'):
+            time.sleep(completion_tokens / self.config.tokens_per_second)
+            return self.send_json({
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                          'total_tokens': prompt_tokens + completion_tokens}})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        pieces = re.findall(r'\S+\s*|\s+', reply) or ['']
+        for i, piece in enumerate(pieces):
+            delta = {'role': 'assistant', 'content': piece} if i == 0 else {'content': piece}
+            self.send_event({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                             'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})
+            time.sleep(count_tokens(piece) / self.config.tokens_per_second)
+        self.send_event({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                         'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+        self.close_connection = True
+
+    def send_event(self, payload):
+        self.wfile.write(b'data: ' + json.dumps(payload).encode('utf-8') + b'\n\n')
+        self.wfile.flush()
+
+    def embeddings(self, body):
+        inputs = body.get('input', [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        tokens = sum(count_tokens(text) if isinstance(text, str) else len(text) for text in inputs)
+        self.stats.add(embedding_calls=1, embedded_inputs=len(inputs), embedding_tokens=tokens)
+        time.sleep(self.config.embedding_latency)
+        self.send_json({
+            'object': 'list', 'model': body.get('model', 'stub'),
+            'data': [{'object': 'embedding', 'index': i, 'embedding': embedding(text, self.config.embedding_dim)}
+                     for i, text in enumerate(inputs)],
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}})
+
+
+def start_server(config=None, host='127.0.0.1', port=0):
+    '''
+    Start the stub on a background thread; returns (server, stats). port=0 picks a free port
+    '''
+    stats = StubStats()
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': config or StubConfig(), 'stats': stats})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the OpenAI-compatible stub server.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=200, help='time to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=200)
+    parser.add_argument('--completion-tokens', type=int, default=200)
+    parser.add_argument('--embedding-latency-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.tokens_per_second, args.completion_tokens, args.embedding_latency_ms)
+    server, _ = start_server(config, port=args.port)
+    print(f'Stub OpenAI server on http://127.0.0.1:{server.server_port}/v1 (fixtures under /sites/)')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
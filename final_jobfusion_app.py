@@ -2,14 +2,16 @@ import os
 import sys
 import logging
 import streamlit as st
-import docx2txt
+from tools.document_ingestion import parse_document
 from crewai import Crew, Task, Agent
 from crewai_tools import ScrapeWebsiteTool
 from jobfusion_agents import JobFusion_Agents
 from jobfusion_tasks import JobFusion_Tasks
-from langchain.chat_models import ChatOpenAI
+from tools.task_scheduler import kickoff_task_graph
+from tools.tracing import trace_run
+from tools.llm_registry import get_chat_llm
+from tools.workspace import Workspace, cleanup_workspaces
 from dotenv import load_dotenv
-from Config import configure as cfg
 from mock_interview_chatbot import *
 import streamlit as st
 
@@ -30,40 +32,72 @@ os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
 openai_api_key = st.secrets["OPENAI_API_KEY"]
 
 # Initialize OpenAI API model
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo', temperature=0.7)
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo', temperature=0.7)
 
 # JobFusion Crew Class
 class JobFusionCrew:
-    def __init__(self, resume_input, personal_writeup_input, jd_url_input):
+    def __init__(self, resume_input, personal_writeup_input, jd_url_input, output_dir='output'):
         self.resume_input = resume_input
         self.personal_writeup_input = personal_writeup_input  
         self.jd_url = jd_url_input 
+        self.output_dir = output_dir
 
     def run(self):
         agents = JobFusion_Agents(self.resume_input, self.jd_url)
-        tasks = JobFusion_Tasks(self.resume_input, self.personal_writeup_input, self.jd_url)
+        tasks = JobFusion_Tasks(self.resume_input, self.personal_writeup_input, self.jd_url, self.output_dir)
+
+        # Build each agent once; the profiler, resume and cover letter agents share one resume index
+        researcher_agent = agents.researcher()
+        profiler_agent = agents.profiler()
+        resume_strategist_agent = agents.resume_strategist()
+        cover_letter_strategist_agent = agents.cover_letter_strategist()
+        interview_preparer_agent = agents.interview_preparer()
+
+        # JD research and profiling are independent; the cover letter and interview prep both wait only for the resume
+        research_task = tasks.research_task(researcher_agent)
+        profile_task = tasks.profile_task(profiler_agent)
+        resume_strategy_task = tasks.resume_strategy_task(resume_strategist_agent, context=[research_task, profile_task])
+        cover_letter_strategy_task = tasks.cover_letter_strategy_task(cover_letter_strategist_agent, context=[research_task, profile_task, resume_strategy_task])
+        interview_preparation_task = tasks.interview_preparation_task(interview_preparer_agent, context=[research_task, resume_strategy_task])
 
         crew = Crew(
             agents=[
-                agents.researcher(), 
-                agents.profiler(), 
-                agents.resume_strategist(),
-                agents.cover_letter_strategist(),
-                agents.interview_preparer()
+                researcher_agent, 
+                profiler_agent, 
+                resume_strategist_agent,
+                cover_letter_strategist_agent,
+                interview_preparer_agent
             ],
             tasks=[
-                tasks.research_task(agents.researcher()),
-                tasks.profile_task(agents.profiler()),
-                tasks.resume_strategy_task(agents.resume_strategist()),
-                tasks.cover_letter_strategy_task(agents.cover_letter_strategist()),
-                tasks.interview_preparation_task(agents.interview_preparer())
+                research_task,
+                profile_task,
+                resume_strategy_task,
+                cover_letter_strategy_task,
+                interview_preparation_task
             ],
             verbose=True
         )
 
-        results = crew.kickoff()
+        with trace_run('build_docs', os.path.join(self.output_dir, 'traces')):
+            results = kickoff_task_graph(crew)
         return results
 
+# Function to get this session's workspace; its ID is kept in the URL so it survives browser reconnects
+def current_workspace():
+    workspace_id = st.session_state.get('workspace') or st.query_params.get('workspace')
+    try:
+        workspace = Workspace(workspace_id)
+    except ValueError:
+        workspace = Workspace()
+    st.session_state['workspace'] = workspace.workspace_id
+    st.query_params['workspace'] = workspace.workspace_id
+    return workspace
+
+# Remove expired workspaces, at most once an hour per server process
+@st.cache_resource(ttl=3600)
+def schedule_workspace_cleanup():
+    return cleanup_workspaces()
+
 # Setup Streamlit UI
 def setup_streamlit_ui():
     st.subheader('Welcome to JobFusion Crew -- AI-powered career advisory service with an agentic workflow to help you secure job interviews.')
@@ -80,25 +114,20 @@ def setup_streamlit_ui():
 def main():
     uploaded_resume, uploaded_personal_writeup, jd_url_input = setup_streamlit_ui()
 
+    # Uploads and crew outputs of this session live in its own workspace
+    schedule_workspace_cleanup()
+    workspace = current_workspace()
+
     if st.button('Start Processing'):
         if uploaded_resume and uploaded_personal_writeup and jd_url_input:
             st.write('Processing now....')
             logger.debug('Starting Agentic Workflow')
 
-            # create output directory to store angent outputs
-            os.makedirs("output/", exist_ok=True)
-
-            resume_path = os.path.join("streamlit/", uploaded_resume.name)
-            os.makedirs(os.path.dirname(resume_path), exist_ok=True)
-            with open(resume_path, "wb") as f:
-                f.write(uploaded_resume.getbuffer())
-
-            personal_writeup_path = os.path.join("streamlit/", uploaded_personal_writeup.name)
-            os.makedirs(os.path.dirname(personal_writeup_path), exist_ok=True)
-            with open(personal_writeup_path, "wb") as f:
-                f.write(uploaded_personal_writeup.getbuffer())
+            # Save uploaded files into the session workspace
+            resume_path = workspace.save_upload(uploaded_resume)
+            personal_writeup_path = workspace.save_upload(uploaded_personal_writeup)
 
-            JobFusionCrew(resume_path, personal_writeup_path, jd_url_input).run()
+            JobFusionCrew(resume_path, personal_writeup_path, jd_url_input, workspace.output_dir).run()
             logger.debug('Agentic Workflow finished')
         else:
             st.error("Please upload both resume and personal writeup.")
@@ -107,17 +136,17 @@ def main():
     col1, col2, col3 = st.columns([1, 1, 1])
 
     if col1.button('1 - Generate Resume'):
-        with open('output/updated_resume.md', 'r') as file:
+        with open(workspace.path('updated_resume.md'), 'r') as file:
             resume_output = file.read()
         st.download_button('Download Resume', resume_output, file_name='updated_resume.txt', mime='text/plain')
 
     if col2.button('2 - Generate Cover Letter'):
-        with open('output/coverletter.md', 'r') as file:
+        with open(workspace.path('coverletter.md'), 'r') as file:
             cover_letter_output = file.read()
         st.download_button('Download Cover Letter', cover_letter_output, file_name='coverletter.txt', mime='text/plain')
 
     if col3.button('3 - Generate Interview Preparation Materials'):
-        with open('output/interview_preparation_materials.txt', 'r') as file:
+        with open(workspace.path('interview_preparation_materials.txt'), 'r') as file:
             interview_preparation_output = file.read()
         st.download_button('Download Interview Preparation', interview_preparation_output, file_name='interview_preparation_materials.txt', mime='text/plain')
     
@@ -125,22 +154,29 @@ def main():
     st.text('')
     st.text('')
     st.write('You can chat with Career Adviser.')
-    if uploaded_resume and uploaded_personal_writeup and jd_url_input:
+    # Ensure the necessary documents are uploaded, saved to the workspace and the job qualifications extracted by the crew
+    documents_uploaded = uploaded_resume and uploaded_personal_writeup and jd_url_input
+    if documents_uploaded and not all(os.path.exists(path) for path in (workspace.upload_path(uploaded_resume.name),
+                                                                         workspace.upload_path(uploaded_personal_writeup.name),
+                                                                         workspace.path('jd.txt'))):
+        st.info('Please click Start Processing first: the chatbot uses your saved documents and the job qualifications it extracts.')
+    elif documents_uploaded:
         logger.debug('Starting Career Advice Chatbot')
-        resume_path = os.path.join("streamlit/", uploaded_resume.name)
-        personal_writeup_path = os.path.join("streamlit/", uploaded_personal_writeup.name)
-        user_resume = docx2txt.process(resume_path)
-        user_personal_writeup = docx2txt.process(personal_writeup_path)
+        resume_path = workspace.upload_path(uploaded_resume.name)
+        personal_writeup_path = workspace.upload_path(uploaded_personal_writeup.name)
+        user_resume = parse_document(resume_path)
+        user_personal_writeup = parse_document(personal_writeup_path)
         job_qualifications = []
-        with open("output/jd.txt", 'r', encoding='utf-8') as file:
+        with open(workspace.path('jd.txt'), 'r', encoding='utf-8') as file:
             content = file.read()
             job_qualifications.append(content)
         logger.debug("Resume and personal writeup loaded successfully.")
 
+        # Token-budgeted chat memory: recent turns verbatim, older turns folded into a rolling summary
         if 'chat_history' in st.session_state:
             chat_history = st.session_state['chat_history']
         else:
-            chat_history = []
+            chat_history = new_chat_memory()
 
         # Store generated responses
         if "messages" not in st.session_state.keys():
@@ -153,11 +189,9 @@ def main():
         # read in job qualifications from the output of JobFusionCrew
         # jd_result = WEBScrapeWebsiteToolAgent(cfg.web_agent_role, cfg.web_agent_goal, cfg.web_agent_bk, cfg.web_task_goal, jd_url_input)
         files = file_loading("inputs/contents/")
-        docs = doc_load_split(files)
-        db = build_vectordb(docs)
+        db = build_vectordb(files)
 
         if db:
-            chat_history = st.session_state.get('chat_history', [])
             qa_chain = get_qa_chain(
                 db, k=3, chain_type="stuff", user_resume=user_resume, 
                 user_personal_writeup=user_personal_writeup, job_qualifications=job_qualifications,
@@ -172,7 +206,7 @@ def main():
                     with st.chat_message('assistant'):
                         message_placeholder = st.empty()
                         full_response = ""
-                        bot_response = qa_chain.run({"question": prompt, "chat_history": chat_history})
+                        bot_response = qa_chain.run({"question": prompt, "chat_history": chat_history.as_chat_history()})
                         for chunk in re.findall(r'\S+|\n', bot_response):
                             full_response += chunk + " "
                             time.sleep(0.05)
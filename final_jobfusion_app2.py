@@ -31,17 +31,13 @@ import os
 import sys
 import logging
 import streamlit as st
-import docx2txt
-from crewai import Crew, Task, Agent, Process
-from crewai_tools import ScrapeWebsiteTool
-from jobfusion_agents import JobFusion_Agents
-from jobfusion_tasks import JobFusion_Tasks
-from jobfusion2_agents import JobFusion2_Agents
-from jobfusion2_tasks import JobFusion2_Tasks
-from langchain.chat_models import ChatOpenAI
+# crewai, langchain and the agent/task/chatbot modules are heavy, so they are imported where first used
+from tools.task_scheduler import kickoff_task_graph
+from tools.job_queue import JobManager
+from tools.workspace import Workspace, cleanup_workspaces
+from tools.document_ingestion import parse_document
+from tools.tracing import latest_trace, summarize_trace, trace_run
 # from dotenv import load_dotenv
-from mock_interview_chatbot import *
-import streamlit as st
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -59,78 +55,186 @@ sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"] 
 openai_api_key = st.secrets["OPENAI_API_KEY"]
 
-# Initialize OpenAI API models for use in the application
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo', temperature=0.7)
-manager_llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo')
+# Initialize the OpenAI manager model on first use, from the shared client registry
+def manager_llm_35_turbo():
+    from tools.llm_registry import get_chat_llm
+    return get_chat_llm('gpt-3.5-turbo')
 
 # JobFusionCrew class to create an updated version of the resume and cover letter
 class JobFusionCrew:
-    def __init__(self, resume_input, personal_writeup_input, jd_url_input):
+    def __init__(self, resume_input, personal_writeup_input, jd_url_input, output_dir='output'):
         self.resume_input = resume_input
         self.personal_writeup_input = personal_writeup_input  
         self.jd_url = jd_url_input 
+        self.output_dir = output_dir
+
+    def run(self, task_callback=None):
+        from crewai import Crew
+        from jobfusion_agents import JobFusion_Agents
+        from jobfusion_tasks import JobFusion_Tasks
 
-    def run(self):
         # Initialize agents and tasks
         agents = JobFusion_Agents(self.resume_input, self.jd_url)
-        tasks = JobFusion_Tasks(self.resume_input, self.personal_writeup_input, self.jd_url)
+        tasks = JobFusion_Tasks(self.resume_input, self.personal_writeup_input, self.jd_url, self.output_dir)
+
+        # Build each agent once; the profiler, resume and cover letter agents share one resume index
+        researcher_agent = agents.researcher()
+        profiler_agent = agents.profiler()
+        resume_strategist_agent = agents.resume_strategist()
+        cover_letter_strategist_agent = agents.cover_letter_strategist()
+        interview_preparer_agent = agents.interview_preparer()
+
+        # JD research and profiling are independent; the cover letter and interview prep both wait only for the resume
+        research_task = tasks.research_task(researcher_agent)
+        profile_task = tasks.profile_task(profiler_agent)
+        resume_strategy_task = tasks.resume_strategy_task(resume_strategist_agent, context=[research_task, profile_task])
+        cover_letter_strategy_task = tasks.cover_letter_strategy_task(cover_letter_strategist_agent, context=[research_task, profile_task, resume_strategy_task])
+        interview_preparation_task = tasks.interview_preparation_task(interview_preparer_agent, context=[research_task, resume_strategy_task])
 
         crew = Crew(
             agents=[
-                agents.researcher(), 
-                agents.profiler(), 
-                agents.resume_strategist(),
-                agents.cover_letter_strategist(),
-                agents.interview_preparer()
+                researcher_agent, 
+                profiler_agent, 
+                resume_strategist_agent,
+                cover_letter_strategist_agent,
+                interview_preparer_agent
             ],
             tasks=[
-                tasks.research_task(agents.researcher()),
-                tasks.profile_task(agents.profiler()),
-                tasks.resume_strategy_task(agents.resume_strategist()),
-                tasks.cover_letter_strategy_task(agents.cover_letter_strategist()),
-                tasks.interview_preparation_task(agents.interview_preparer())
+                research_task,
+                profile_task,
+                resume_strategy_task,
+                cover_letter_strategy_task,
+                interview_preparation_task
             ],
             verbose=True
         )
 
-        # Kickoff the process and return results
-        results = crew.kickoff()
+        # Report each finished task, e.g. to the background job's progress record
+        for task in crew.tasks:
+            task.callback = task_callback
+
+        # Kickoff the process and return results; independent tasks run concurrently, traced into the workspace
+        with trace_run('build_docs', os.path.join(self.output_dir, 'traces')):
+            results = kickoff_task_graph(crew)
         return results
 
 # JobFusionCrew 2 Class to modify the resume and cover letter based on users feedback
 class JobFusionCrew2:
-    def __init__(self, ori_resume_input, ori_personal_writeup_input, latest_resume_input, jd_qualifications_input, users_feedback):
+    def __init__(self, ori_resume_input, ori_personal_writeup_input, latest_resume_input, jd_qualifications_input, users_feedback, output_dir='output'):
         self.original_resume_input = ori_resume_input
         self.original_personal_writeup_input = ori_personal_writeup_input
         self.latest_resume_input = latest_resume_input
         self.jd_qualifications_input = jd_qualifications_input
         self.users_feedback = users_feedback
+        self.output_dir = output_dir
+
+    def run(self, task_callback=None):
+        from crewai import Crew, Process
+        from jobfusion2_agents import JobFusion2_Agents
+        from jobfusion2_tasks import JobFusion2_Tasks
 
-    def run(self):
         agents = JobFusion2_Agents(self.original_resume_input, self.original_personal_writeup_input, self.latest_resume_input)
-        tasks = JobFusion2_Tasks(self.original_resume_input, self.original_personal_writeup_input, self.jd_qualifications_input, self.latest_resume_input, self.users_feedback)
+        tasks = JobFusion2_Tasks(self.original_resume_input, self.original_personal_writeup_input, self.jd_qualifications_input, self.latest_resume_input, self.users_feedback, self.output_dir)
+
+        # Build each agent once
+        resume_strategist_agent = agents.resume_strategist()
+        cover_letter_strategist_agent = agents.cover_letter_strategist()
+        document_validation_manager_agent = agents.document_validation_manager()
 
         # Define the crew and hierarchical process
         crew = Crew(
             agents=[
-                agents.resume_strategist(),
-                agents.cover_letter_strategist(),
-                agents.document_validation_manager()
+                resume_strategist_agent,
+                cover_letter_strategist_agent,
+                document_validation_manager_agent
             ],
             tasks=[
-                tasks.resume_strategy_task(agents.resume_strategist()),
-                tasks.cover_letter_strategy_task(agents.cover_letter_strategist()),
-                tasks.document_validation_task(agents.document_validation_manager())
+                tasks.resume_strategy_task(resume_strategist_agent),
+                tasks.cover_letter_strategy_task(cover_letter_strategist_agent),
+                tasks.document_validation_task(document_validation_manager_agent)
             ],
             process = Process.hierarchical, # Hierarchical process to manage delegation
-            manager_llm = manager_llm_35_turbo,  # Assign the manager_llm to the Crew
+            manager_llm = manager_llm_35_turbo(),  # Assign the manager_llm to the Crew
             verbose=True
         )
 
-        # Kickoff the process and return results
-        results = crew.kickoff()
+        # Report each finished task, e.g. to the background job's progress record
+        for task in crew.tasks:
+            task.callback = task_callback
+
+        # Kickoff the process and return results, traced into the workspace
+        with trace_run('edit_docs', os.path.join(self.output_dir, 'traces')):
+            results = crew.kickoff()
         return results
 
+# Shared worker pool for crew runs, one per server process
+@st.cache_resource
+def get_job_manager():
+    return JobManager(max_workers=4)
+
+# Function to get this session's workspace; its ID is kept in the URL so it survives browser reconnects
+def current_workspace():
+    workspace_id = st.session_state.get('workspace') or st.query_params.get('workspace')
+    try:
+        workspace = Workspace(workspace_id)
+    except ValueError:
+        workspace = Workspace()
+    st.session_state['workspace'] = workspace.workspace_id
+    st.query_params['workspace'] = workspace.workspace_id
+    return workspace
+
+# Remove expired workspaces, at most once an hour per server process
+@st.cache_resource(ttl=3600)
+def schedule_workspace_cleanup():
+    return cleanup_workspaces()
+
+# Function to get the job started by this user; the job ID is kept in the URL so it survives browser reconnects
+def current_job_id(key):
+    if key not in st.session_state and key in st.query_params:
+        st.session_state[key] = st.query_params[key]
+    return st.session_state.get(key)
+
+# Function to submit a crew run to the background job queue
+def start_job(key, kind, fn, *args, total_tasks=None):
+    job_id = get_job_manager().submit(kind, fn, *args, total_tasks=total_tasks)
+    st.session_state[key] = job_id
+    st.query_params[key] = job_id
+    return job_id
+
+# Function to show a job's progress, polled every few seconds without rerunning the whole page
+@st.experimental_fragment(run_every=3)
+def show_job_status(key):
+    job = get_job_manager().get(current_job_id(key))
+    if job is None:
+        return
+    completed_tasks = len(job['completed_tasks'])
+    total_tasks = job['total_tasks'] or max(completed_tasks, 1)
+    if job['status'] in ('queued', 'running'):
+        st.progress(min(completed_tasks / total_tasks, 1.0), text=f"{job['status'].capitalize()}: {completed_tasks}/{total_tasks} tasks done")
+    elif job['status'] == 'succeeded':
+        st.success('Your documents are ready.')
+    else:
+        st.error(f"The job {job['status']}: {job['error']}")
+
+# Function to show the timing breakdown of this session's latest crew run or chat turn, refreshed while it runs
+@st.experimental_fragment(run_every=5)
+def show_run_timings(trace_dir):
+    trace_path = latest_trace(trace_dir)
+    summary = summarize_trace(trace_path) if trace_path else None
+    if summary is None:
+        return
+    st.subheader('Last run timings')
+    status = summary['status'] if summary['finished'] else 'running'
+    st.write(f"**{summary['name']}** ({status}): {summary['seconds']:.1f}s, {summary['llm_calls']} LLM calls, "
+             f"{summary['tokens']:,} tokens, ~${summary['cost_usd']:.4f}")
+    if summary['by_task']:
+        st.caption('Per task')
+        st.dataframe(summary['by_task'], hide_index=True)
+    st.caption('Per call type')
+    st.dataframe(summary['by_kind'], hide_index=True)
+    st.caption('Slowest calls and agent iterations')
+    st.dataframe(summary['slowest'], hide_index=True)
+
 # Setup Streamlit UI components
 def setup_streamlit_ui():
     st.write('Please upload your personal write-up, resume, and job description link.')
@@ -149,49 +253,46 @@ def main():
     
     tab1, tab2, tab3 = st.tabs(["Build Docs", "Edit Docs", "Career Chat"])
 
+    # Uploads and crew outputs of this session live in its own workspace
+    schedule_workspace_cleanup()
+    workspace = current_workspace()
+    with st.sidebar:
+        show_run_timings(workspace.path('traces'))
+
     # Tab 1: Build Documents (Resume and Cover Letter Creation)
     with tab1:
         uploaded_resume, uploaded_personal_writeup, jd_url_input = setup_streamlit_ui()
         if st.button('Start Processing'):
             if uploaded_resume and uploaded_personal_writeup and jd_url_input:
-                st.write('Processing now....')
+                st.write('Processing in the background, you can keep using the app....')
                 logger.debug('Starting Agentic Workflow')
 
-                # create output directory to store angent outputs
-                os.makedirs("output/", exist_ok=True)
-
-                # Save uploaded files
-                resume_path = os.path.join("streamlit/", uploaded_resume.name)
-                os.makedirs(os.path.dirname(resume_path), exist_ok=True)
-                with open(resume_path, "wb") as f:
-                    f.write(uploaded_resume.getbuffer())
+                # Save uploaded files into the session workspace
+                resume_path = workspace.save_upload(uploaded_resume)
+                personal_writeup_path = workspace.save_upload(uploaded_personal_writeup)
 
-                personal_writeup_path = os.path.join("streamlit/", uploaded_personal_writeup.name)
-                os.makedirs(os.path.dirname(personal_writeup_path), exist_ok=True)
-                with open(personal_writeup_path, "wb") as f:
-                    f.write(uploaded_personal_writeup.getbuffer())
-
-                JobFusionCrew(resume_path, personal_writeup_path, jd_url_input).run()
-                logger.debug('Agentic Workflow finished')
+                job_id = start_job('build_job', 'build_docs', JobFusionCrew(resume_path, personal_writeup_path, jd_url_input, workspace.output_dir).run, total_tasks=5)
+                logger.debug(f'Agentic Workflow submitted as job {job_id}')
             else:
                 st.error("Please upload both resume and personal writeup.")
                 logger.error("Both resume and personal writeup are required.")
+        show_job_status('build_job')
 
         col1, col2, col3 = st.columns([1, 1, 1])
 
         # Generate and download updated documents
         if col1.button('1 - Generate Resume'):
-            with open('output/updated_resume.md', 'r') as file:
+            with open(workspace.path('updated_resume.md'), 'r') as file:
                 resume_output = file.read()
             st.download_button('Download Resume', resume_output, file_name='updated_resume.txt', mime='text/plain')
 
         if col2.button('2 - Generate Cover Letter'):
-            with open('output/coverletter.md', 'r') as file:
+            with open(workspace.path('coverletter.md'), 'r') as file:
                 cover_letter_output = file.read()
             st.download_button('Download Cover Letter', cover_letter_output, file_name='coverletter.txt', mime='text/plain')
 
         if col3.button('3 - Generate Interview Preparation Materials'):
-            with open('output/interview_preparation_materials.txt', 'r') as file:
+            with open(workspace.path('interview_preparation_materials.txt'), 'r') as file:
                 interview_preparation_output = file.read()
             st.download_button('Download Interview Preparation', interview_preparation_output, file_name='interview_preparation_materials.txt', mime='text/plain')
     
@@ -217,29 +318,30 @@ def main():
         }
         
         if st.button('Start Modifying Documents Now'):
-            st.write('Processing now....')
+            st.write('Processing in the background, you can keep using the app....')
             logger.debug('Starting JobFusion2 Crew Agentic Workflow')
 
             # inputs paths for the modification process
-            ori_resume_input = os.path.join("streamlit/", uploaded_resume.name)
-            ori_personal_writeup_input = os.path.join("streamlit/", uploaded_personal_writeup.name)
-            latest_resume_input = 'output/updated_resume.md'
-            jd_qualifications_input = 'output/jd.txt'
+            ori_resume_input = workspace.upload_path(uploaded_resume.name)
+            ori_personal_writeup_input = workspace.upload_path(uploaded_personal_writeup.name)
+            latest_resume_input = workspace.path('updated_resume.md')
+            jd_qualifications_input = workspace.path('jd.txt')
             
-            # Run the JobFusionCrew2 process
-            JobFusionCrew2(ori_resume_input, ori_personal_writeup_input, latest_resume_input, jd_qualifications_input, users_feedback).run()
-            logger.debug('Agentic Workflow JobFusionCrew2 finished')
+            # Run the JobFusionCrew2 process in the background job queue
+            job_id = start_job('edit_job', 'edit_docs', JobFusionCrew2(ori_resume_input, ori_personal_writeup_input, latest_resume_input, jd_qualifications_input, users_feedback, workspace.output_dir).run, total_tasks=3)
+            logger.debug(f'Agentic Workflow JobFusionCrew2 submitted as job {job_id}')
+        show_job_status('edit_job')
 
         col1, col2 = st.columns([1, 1])
 
         # Generate and download revised documents
         if col1.button('1 - Generate Revised Resume'):
-            with open('output/latest_resume.md', 'r') as file:
+            with open(workspace.path('latest_resume.md'), 'r') as file:
                 resume_output = file.read()
             st.download_button('Download Revised Resume', resume_output, file_name='revised_resume.txt', mime='text/plain')
 
         if col2.button('2 - Generate Revised Cover Letter'):
-            with open('output/latest_coverletter.md', 'r') as file:
+            with open(workspace.path('latest_coverletter.md'), 'r') as file:
                 cover_letter_output = file.read()
             st.download_button('Download Revised Cover Letter', cover_letter_output, file_name='revised_coverletter.txt', mime='text/plain')
 
@@ -249,22 +351,29 @@ def main():
         st.write('You can chat with Career Adviser.')
         chat_container = st.container(height=300)
 
-        # Ensure the necessary documents are uploaded
-        if uploaded_resume and uploaded_personal_writeup and jd_url_input:
+        # Ensure the necessary documents are uploaded, saved to the workspace and the job qualifications extracted by Build Docs
+        documents_uploaded = uploaded_resume and uploaded_personal_writeup and jd_url_input
+        if documents_uploaded and not all(os.path.exists(path) for path in (workspace.upload_path(uploaded_resume.name),
+                                                                             workspace.upload_path(uploaded_personal_writeup.name),
+                                                                             workspace.path('jd.txt'))):
+            st.info('Please run Build Docs first: the chatbot uses your saved documents and the job qualifications it extracts.')
+        elif documents_uploaded:
             logger.debug('Starting Career Advice Chatbot')
+            # The chatbot's langchain and FAISS stack loads the first time this tab has documents to work with
+            from mock_interview_chatbot import (file_loading, build_vectordb, new_chat_memory, get_qa_chain,
+                                                StreamlitTokenHandler, update_chat_history)
 
             # Load files and prepare vector database for chatbot
             files = file_loading("inputs/contents/")
-            docs = doc_load_split(files)
-            db = build_vectordb(docs)
+            db = build_vectordb(files)
             
             # Process user documents for chatbot context
-            resume_path = os.path.join("streamlit/", uploaded_resume.name)
-            personal_writeup_path = os.path.join("streamlit/", uploaded_personal_writeup.name)
-            user_resume = docx2txt.process(resume_path)
-            user_personal_writeup = docx2txt.process(personal_writeup_path)
+            resume_path = workspace.upload_path(uploaded_resume.name)
+            personal_writeup_path = workspace.upload_path(uploaded_personal_writeup.name)
+            user_resume = parse_document(resume_path)
+            user_personal_writeup = parse_document(personal_writeup_path)
             job_qualifications = []
-            with open("output/jd.txt", 'r', encoding='utf-8') as file:
+            with open(workspace.path('jd.txt'), 'r', encoding='utf-8') as file:
                 content = file.read()
                 job_qualifications.append(content)
             logger.debug("Resume and personal writeup loaded successfully.")
@@ -273,7 +382,7 @@ def main():
             if 'chat_history' in st.session_state:
                 chat_history = st.session_state['chat_history']
             else:
-                chat_history = []
+                chat_history = new_chat_memory()
 
             # Store generated responses
             if "messages" not in st.session_state.keys():
@@ -286,11 +395,11 @@ def main():
             
             # If vector database is ready, initialize the QA chain
             if db:
-                chat_history = st.session_state.get('chat_history', [])
+                stream_handler = StreamlitTokenHandler()
                 qa_chain = get_qa_chain(
                     db, k=3, chain_type="stuff", user_resume=user_resume, 
                     user_personal_writeup=user_personal_writeup, job_qualifications=job_qualifications,
-                    openai_api_key=openai_api_key, chat_history=chat_history
+                    openai_api_key=openai_api_key, chat_history=chat_history, stream_handler=stream_handler
                 )
 
                 # Handle user input in the chat
@@ -301,13 +410,12 @@ def main():
                             st.write(f'{prompt}')
                         with chat_container.chat_message('assistant'):
                             message_placeholder = st.empty()
-                            full_response = ""
-                            bot_response = qa_chain.run({"question": prompt, "chat_history": chat_history})
-                            for chunk in re.findall(r'\S+|\n', bot_response):
-                                full_response += chunk + " "
-                                time.sleep(0.05)
-                                message_placeholder.markdown(full_response + "▌")
-                            message_placeholder.markdown(full_response)
+
+                            # Stream the answer tokens into the placeholder as the LLM generates them
+                            stream_handler.start(message_placeholder)
+                            with trace_run('career_chat', workspace.path('traces')):
+                                bot_response = qa_chain.run({"question": prompt, "chat_history": chat_history.as_chat_history()})
+                            message_placeholder.markdown(bot_response)
                             chat_history = update_chat_history(chat_history, prompt, bot_response)
 
                             # Update chat history in session state
@@ -1,12 +1,12 @@
 from crewai import Agent
-from langchain.chat_models import ChatOpenAI
+from tools.llm_registry import get_chat_llm
 from dotenv import load_dotenv
 import os
 # from tavily import TavilyClient
 
 # from tools.browser_tools import BrowserTools
-from crewai_tools import ScrapeWebsiteTool, DOCXSearchTool, SeleniumScrapingTool
-import docx2txt
+from crewai_tools import ScrapeWebsiteTool, SeleniumScrapingTool
+from tools.document_search_tool import DocumentSearchTool
 import streamlit as st
 os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"] 
 openai_api_key = st.secrets["OPENAI_API_KEY"]
@@ -15,14 +15,21 @@ openai_api_key = st.secrets["OPENAI_API_KEY"]
 # load_dotenv()
 # openai_api_key = os.getenv('OPENAI_API_KEY')
 
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo', temperature=0.7)
-manager_llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo')
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo', temperature=0.7)
+manager_llm_35_turbo = get_chat_llm('gpt-3.5-turbo')
 
 class JobFusion2_Agents():
     def __init__(self, ori_resume_input, ori_personal_writeup_input, latest_resume_input):
         self.original_resume_input = ori_resume_input
         self.original_personal_writeup_input = ori_personal_writeup_input
         self.latest_resume_input = latest_resume_input
+        self._search_tools = {}
+
+    def search_tool(self, document):
+        # One search tool per uploaded file, built once and shared by every agent
+        if document not in self._search_tools:
+            self._search_tools[document] = DocumentSearchTool(document=document)
+        return self._search_tools[document]
 
     def resume_strategist(self):
         return Agent(
@@ -32,7 +39,7 @@ class JobFusion2_Agents():
                            Your expertise lies in not only highlighting the strengths and achievements of an individual but also in carefully revising resumes to incorporate detailed feedback from users. \
                            Whether it's adding new information, correcting errors, or adjusting the style and format, you ensure that the final resume fully aligns with both the job qualifications and the user’s preferences..'''),
                 llm=llm_35_turbo,
-                tools=[DOCXSearchTool()],
+                tools=[self.search_tool(self.original_resume_input)],
                 allow_delegation=False,
                 verbose=True,
                 max_iter=5)
@@ -57,7 +64,7 @@ class JobFusion2_Agents():
                            You excel at transforming a candidate’s resume and profile into a compelling argument, \
                            clearly demonstrating their strengths and fit for the job. Your talent lies in making candidates stand out as the ideal choice for the position.'''),
                 llm=llm_35_turbo,
-                tools=[DOCXSearchTool(docx=self.original_personal_writeup_input)],
+                tools=[self.search_tool(self.original_personal_writeup_input)],
                 allow_delegation=False,
                 verbose=True,
                 max_iter=5)
@@ -1,16 +1,18 @@
 from crewai import Agent, Task, Crew, Process
 from textwrap import dedent
 from datetime import date
-import docx2txt
+from tools.document_ingestion import parse_document
+import os
 from mock_interview_chatbot import read_txt_files
 
 class JobFusion2_Tasks():
-    def __init__(self, ori_resume_input, ori_personal_writeup_input, jd_qualifications_input, latest_resume_input, users_feedback):
-        self.original_resume = docx2txt.process(ori_resume_input)
-        self.original_personal_writeup = docx2txt.process(ori_personal_writeup_input)
+    def __init__(self, ori_resume_input, ori_personal_writeup_input, jd_qualifications_input, latest_resume_input, users_feedback, output_dir='output'):
+        self.original_resume = parse_document(ori_resume_input)
+        self.original_personal_writeup = parse_document(ori_personal_writeup_input)
         self.jd_qualifications = read_txt_files(jd_qualifications_input)
         self.latest_resume = read_txt_files(latest_resume_input)
         self.users_feedback = users_feedback
+        self.output_dir = output_dir
 
     def resume_strategy_task(self, agent):
         return Task(description=dedent(f'''
@@ -32,7 +34,7 @@ class JobFusion2_Tasks():
             General Suggestions: {self.users_feedback['general_suggestions']}
             '''),
             expected_output=("An updated resume that effectively highlights the candidate's qualifications to the job qualifications while fully incorporating the user’s feedback."),
-            output_file='output/latest_resume.md',
+            output_file=os.path.join(self.output_dir, 'latest_resume.md'),
             agent=agent) 
     
     def document_validation_task(self, agent):
@@ -74,7 +76,7 @@ class JobFusion2_Tasks():
             Personal Profile: {self.original_personal_writeup}
             '''),
             expected_output=("A cover letter that effectively highlights the candidate's qualifications and experiences relevant to the job."),
-            output_file='output/latest_coverletter.md',
+            output_file=os.path.join(self.output_dir, 'latest_coverletter.md'),
             agent=agent) 
 
     def __tip_section(self):
@@ -1,11 +1,13 @@
 from crewai import Agent
-from langchain.chat_models import ChatOpenAI
+from tools.llm_registry import get_chat_llm
 from dotenv import load_dotenv
 import os
 # from tavily import TavilyClient
 
 # from tools.browser_tools import BrowserTools
-from crewai_tools import ScrapeWebsiteTool, DOCXSearchTool, SeleniumScrapingTool
+from crewai_tools import ScrapeWebsiteTool, SeleniumScrapingTool
+from tools.document_search_tool import DocumentSearchTool
+from tools.jd_scraper_tools import JDScraperTools
 
 import streamlit as st
 os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"] 
@@ -15,13 +17,20 @@ openai_api_key = st.secrets["OPENAI_API_KEY"]
 # load_dotenv()
 # openai_api_key = os.getenv('OPENAI_API_KEY')
 
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo')
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo')
 
 
 class JobFusion_Agents():
     def __init__(self, resume_input, jd_url_input):
         self.resume_input = resume_input
         self.jd_url = jd_url_input
+        self._resume_search_tool = None
+
+    def resume_search_tool(self):
+        # Built once and shared by every agent; the index itself is cached by content hash across runs
+        if self._resume_search_tool is None:
+            self._resume_search_tool = DocumentSearchTool(document=self.resume_input)
+        return self._resume_search_tool
 
     def researcher(self):
         return Agent(
@@ -31,7 +40,7 @@ class JobFusion_Agents():
                 is unparalleled. Your keen ability to identify the essential qualifications and skills \
                 sought by employers forms the foundation for effective and tailored job applications.'),
             llm=llm_35_turbo,
-            tools=[ScrapeWebsiteTool(website_url=self.jd_url)],
+            tools=[JDScraperTools(jd_url=self.jd_url)],
             allow_delegation=False,
             verbose=True,
             max_iter=5)
@@ -44,7 +53,7 @@ class JobFusion_Agents():
                     sources to craft comprehensive personal and professional profiles, laying the groundwork \
                     for personalized resume enhancements.'),
                 llm=llm_35_turbo,
-                tools=[DOCXSearchTool(docx=self.resume_input)],
+                tools=[self.resume_search_tool()],
                 allow_delegation=False,
                 verbose=True,
                 max_iter=5)
@@ -56,7 +65,7 @@ class JobFusion_Agents():
                 backstory=('''With a strategic mind and an eye for detail, you excel at refining resumes to highlight the \
                     most relevant skills and experiences, ensuring they resonate perfectly with the job's requirements.'''),
                 llm=llm_35_turbo,
-                tools=[DOCXSearchTool(docx=self.resume_input)],
+                tools=[self.resume_search_tool()],
                 allow_delegation=False,
                 verbose=True,
                 max_iter=5)
@@ -68,7 +77,7 @@ class JobFusion_Agents():
                 backstory=('''With a strategic mind and an eye for detail, you excel at highlight the \
                     most relevant skills and experiences, ensuring they resonate perfectly with the job's requirements.'''),
                 llm=llm_35_turbo,
-                tools=[DOCXSearchTool(docx=self.resume_input)],
+                tools=[self.resume_search_tool()],
                 allow_delegation=False,
                 verbose=True,
                 max_iter=5)
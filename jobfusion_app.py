@@ -1,13 +1,14 @@
 from crewai import Crew, Task, Agent
-from crewai_tools import ScrapeWebsiteTool, DOCXSearchTool, SeleniumScrapingTool
+from crewai_tools import ScrapeWebsiteTool, SeleniumScrapingTool
 from jobfusion_agents import JobFusion_Agents
 from jobfusion_tasks import JobFusion_Tasks
-from langchain.chat_models import ChatOpenAI
+from tools.task_scheduler import kickoff_task_graph
+from tools.tracing import trace_run
+from tools.llm_registry import get_chat_llm
 from textwrap import dedent
 import tempfile
 import os
 import streamlit as st
-import docx2txt
 
 __import__('pysqlite3')
 import sys
@@ -20,7 +21,7 @@ openai_api_key = st.secrets["OPENAI_API_KEY"]
 # load_dotenv()
 # openai_api_key = os.getenv('OPENAI_API_KEY')
 
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo')
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo')
 
 class JobFusion_Crew():
     def __init__(self, resume_input, personal_writeup_input, jd_url_input):
@@ -44,9 +45,9 @@ class JobFusion_Crew():
 
         research_task = tasks.research_task(researcher_agent)
         profile_task = tasks.profile_task(profiler_agent)
-        resume_strategy_task = tasks.resume_strategy_task(resume_strategist_agent)
-        cover_letter_strategy_task = tasks.cover_letter_strategy_task(cover_letter_strategist_agent)
-        interview_preparation_task = tasks.interview_preparation_task(interview_preparer_agent)
+        resume_strategy_task = tasks.resume_strategy_task(resume_strategist_agent, context=[research_task, profile_task])
+        cover_letter_strategy_task = tasks.cover_letter_strategy_task(cover_letter_strategist_agent, context=[research_task, profile_task, resume_strategy_task])
+        interview_preparation_task = tasks.interview_preparation_task(interview_preparer_agent, context=[research_task, resume_strategy_task])
 
         crew = Crew(
             agents=[researcher_agent, profiler_agent, resume_strategist_agent, cover_letter_strategist_agent, interview_preparer_agent],
@@ -54,7 +55,8 @@ class JobFusion_Crew():
             verbose=True
         )
 
-        results = crew.kickoff()
+        with trace_run('build_docs'):
+            results = kickoff_task_graph(crew)
         return results
 
 
@@ -1,16 +1,18 @@
 from crewai import Task
+import os
 from textwrap import dedent
 from datetime import date
-import docx2txt
+from tools.document_ingestion import parse_document
 
 
 class JobFusion_Tasks():
-    def __init__(self, resume_input, personal_writeup_input, jd_url_input):
+    def __init__(self, resume_input, personal_writeup_input, jd_url_input, output_dir='output'):
         # self.personal_writeup = textract.process(personal_writeup_input)
         # self.resume = textract.process(resume_input)
         self.jd_url = jd_url_input 
-        self.personal_writeup = docx2txt.process(personal_writeup_input)
-        self.resume = docx2txt.process(resume_input)
+        self.output_dir = output_dir
+        self.personal_writeup = parse_document(personal_writeup_input)
+        self.resume = parse_document(resume_input)
 
     def research_task(self, agent):
         return Task(description=dedent(f'''
@@ -21,7 +23,7 @@ class JobFusion_Tasks():
             Job description URL: {self.jd_url}
             '''),
             expected_output=("A structured list of job requirements, including necessay skills, qualifications and experiences."),
-            output_file='output/jd.txt',
+            output_file=os.path.join(self.output_dir, 'jd.txt'),
             agent=agent)
   
     def profile_task(self, agent):
@@ -37,7 +39,7 @@ class JobFusion_Tasks():
                                 and capabilities to solve business problems."),
             agent=agent)
 
-    def resume_strategy_task(self, agent):
+    def resume_strategy_task(self, agent, context=None):
         return Task(description=dedent(f'''
             Using the profile and job requirements obtained from previous tasks, tailor the resume to highlight the most relevant areas. 
             Employ tools to adjust and enhance the resume content. Make sure this is the best resume even but 
@@ -46,20 +48,22 @@ class JobFusion_Tasks():
             {self.__tip_section()}
             '''),
             expected_output=("An updated resume that effectively highlights the candidate's qualifications and experiences relevant to the job."),
-            output_file='output/updated_resume.md',
+            output_file=os.path.join(self.output_dir, 'updated_resume.md'),
+            context=context,
             agent=agent) 
     
-    def cover_letter_strategy_task(self, agent):
+    def cover_letter_strategy_task(self, agent, context=None):
         return Task(description=dedent(f'''
             Using the profile, job requirements obtained from previous tasks, and the udpated resume to write a cover letter to apply the position within 4 paragraphs. 
             Make sure to emphasize the candidate's strengths but don't make up any information, and reflect the candidates abilities and how it matches the job posting.
             {self.__tip_section()}
             '''),
             expected_output=("A cover letter that effectively highlights the candidate's qualifications and experiences relevant to the job."),
-            output_file='output/coverletter.md',
+            output_file=os.path.join(self.output_dir, 'coverletter.md'),
+            context=context,
             agent=agent) 
   
-    def interview_preparation_task(self, agent):
+    def interview_preparation_task(self, agent, context=None):
         return Task(description=dedent(f'''
             Create a set of potential interview questions and talking points based on the latest updated resume and job requirements. 
             Utilize tools to generate relevant questions and discussion points. Make sure to use these question and talking points to help 
@@ -67,7 +71,8 @@ class JobFusion_Tasks():
             {self.__tip_section()}
             '''),
             expected_output=("A document containing key questions and talking points that the candidate should prepare for the interview."),
-            output_file='output/interview_preparation_materials.txt',
+            output_file=os.path.join(self.output_dir, 'interview_preparation_materials.txt'),
+            context=context,
             agent=agent) 
 
     def __tip_section(self):
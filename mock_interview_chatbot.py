@@ -1,18 +1,23 @@
 #### Streamlit run mock_interview_chatbot.py
 import os
 import sys
-import docx2txt
+from tools.document_ingestion import parse_document
 import time
 import re
-from langchain_community.embeddings import OpenAIEmbeddings
+import hashlib
 from langchain_community.vectorstores import FAISS
 from langchain.prompts import PromptTemplate
-from langchain_community.chat_models import ChatOpenAI
-from langchain.retrievers import ContextualCompressionRetriever
+from tools.llm_registry import get_chat_llm
+from langchain.retrievers import ContextualCompressionRetriever, MergerRetriever
+from langchain_core.documents import Document
 from langchain.chains import ConversationalRetrievalChain
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.retrievers.document_compressors import LLMChainExtractor
+from langchain_core.callbacks import BaseCallbackHandler
+from tools.embedding_cache import get_cached_embeddings
+from tools.faiss_index import IncrementalFAISSIndex
+from tools.local_reranker import CrossEncoderReranker
+from tools.chat_memory import RollingChatMemory
 
 import streamlit as st
 __import__('pysqlite3')
@@ -26,7 +31,10 @@ sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 # Load OpenAI API key from streamlit 
 os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"] 
 openai_api_key = st.secrets["OPENAI_API_KEY"]
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo', temperature=0.7)
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo', temperature=0.7)
+
+# Token budget for the verbatim chat turns; older turns are folded into a running summary
+CHAT_MEMORY_TOKEN_BUDGET = 1500
 
 # Function to read in .txt files
 def read_txt_files(txt_file_path):
@@ -39,7 +47,7 @@ def read_txt_files(txt_file_path):
 # Function to load files
 def file_loading(file_path):
     loaded_files = []
-    for file in os.listdir(file_path):
+    for file in sorted(os.listdir(file_path)):
         if file.endswith(".txt"):
             loaded_files.append(file_path + file)
     return loaded_files
@@ -67,33 +75,99 @@ def doc_load_split(files):
     print('Total #s of splitted chunks: {}'.format(len(docs)))
     return docs
 
-# Function to create embeddings and index
-def build_vectordb(docs):
-    embeddings = OpenAIEmbeddings()
-    vectordb = FAISS.from_documents(docs, embeddings)
-    index_folder_path = 'output/faiss_index_chatbot'
-    index_name = 'faiss_0'
-
-    if not os.path.exists(index_folder_path):
-        os.makedirs(index_folder_path)
-    if len(os.listdir(index_folder_path)) == 0:
-        print('Creating FAISS index...')
-        vectordb.save_local(index_folder_path, index_name)
-    else: 
-        print('Loading FAISS index for chat!....')
-        vectordb = FAISS.load_local(index_folder_path, embeddings, index_name, allow_dangerous_deserialization=True)
-    return vectordb
+# Function to create embeddings and index, only re-embedding the chunks of new or changed files
+def build_vectordb(files, index_folder_path='output/faiss_index_chatbot'):
+    # Embeddings come from the shared on-disk cache, so only new or changed chunks are sent to the API
+    embeddings = get_cached_embeddings()
+    index = IncrementalFAISSIndex(index_folder_path, embeddings, index_name='faiss_0')
+    return index.sync(files, doc_load_split)
+
+# In-process caches of the per-session user document indexes and candidate summaries, keyed by content hash
+USER_CACHE_SIZE = 32
+_user_vectordbs = {}
+_candidate_summaries = {}
+
+def remember(cache, key, value):
+    # Drop the oldest entry once the cache is full (dicts keep insertion order)
+    if len(cache) >= USER_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
+    return value
+
+def user_documents_hash(user_resume, user_personal_writeup, job_qualifications):
+    sha = hashlib.sha256()
+    for text in (user_resume, user_personal_writeup, '\n'.join(job_qualifications)):
+        sha.update(text.encode('utf-8'))
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+# Function to chunk and index the user's resume, personal writeup and the job qualifications
+def build_user_vectordb(user_resume, user_personal_writeup, job_qualifications):
+    key = user_documents_hash(user_resume, user_personal_writeup, job_qualifications)
+    if key not in _user_vectordbs:
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=512, chunk_overlap=32)
+        sections = [('Candidate Resume', user_resume),
+                    ('Candidate Personal Writeup', user_personal_writeup),
+                    ('Job Qualifications', '\n'.join(job_qualifications))]
+        docs = []
+        for label, text in sections:
+            # Label each chunk so the model knows which document an excerpt comes from
+            for chunk in text_splitter.split_text(text):
+                docs.append(Document(page_content=f'[{label}] {chunk}', metadata={'source': label}))
+        print('Indexing {} chunks of user documents'.format(len(docs)))
+        remember(_user_vectordbs, key, FAISS.from_documents(docs, get_cached_embeddings()) if docs else None)
+    return _user_vectordbs[key]
+
+# Function to build a short always-on candidate summary, once per set of user documents
+def summarize_candidate(user_resume, user_personal_writeup, job_qualifications):
+    key = user_documents_hash(user_resume, user_personal_writeup, job_qualifications)
+    if key not in _candidate_summaries:
+        job_qualifications_text = '\n'.join(job_qualifications)
+        remember(_candidate_summaries, key, llm_35_turbo.predict(f'''
+        Summarize the candidate below in at most 120 words for a career advisor: current role, years of experience,
+        core skills, notable achievements, and the target role from the job qualifications.
+
+        Job Qualifications: {job_qualifications_text}
+        Resume: {user_resume}
+        Personal Writeup: {user_personal_writeup}
+        '''))
+    return _candidate_summaries[key]
+
+# Callback handler to stream the answer tokens into a Streamlit placeholder as they are generated
+class StreamlitTokenHandler(BaseCallbackHandler):
+    def __init__(self):
+        self.placeholder = None
+        self.text = ''
+
+    def start(self, placeholder):
+        self.placeholder = placeholder
+        self.text = ''
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.text += token
+        if self.placeholder is not None:
+            self.placeholder.markdown(self.text + "▌")
 
 # Function to create the QA chain
-def get_qa_chain(db,k,chain_type,user_resume,user_personal_writeup, job_qualifications,openai_api_key,chat_history):
+def get_qa_chain(db,k,chain_type,user_resume,user_personal_writeup, job_qualifications,openai_api_key,chat_history,stream_handler=None):
     
-    compressor = LLMChainExtractor.from_llm(llm=llm_35_turbo)
+    # Over-fetch with MMR, then rerank locally on CPU with a cross-encoder and keep the top k chunks
     compression_retriever = ContextualCompressionRetriever(
-                        base_compressor = compressor,
-                        base_retriever = db.as_retriever(search_type='mmr'),
-                        search_kwargs={"k": k}
+                        base_compressor = CrossEncoderReranker(top_n=k),
+                        base_retriever = db.as_retriever(search_type='mmr', search_kwargs={"k": k * 3})
                         )
 
+    # Only the sections of the user's documents relevant to the question go into the prompt
+    retriever = compression_retriever
+    user_db = build_user_vectordb(user_resume, user_personal_writeup, job_qualifications)
+    if user_db is not None:
+        user_compression_retriever = ContextualCompressionRetriever(
+                            base_compressor = CrossEncoderReranker(top_n=k),
+                            base_retriever = user_db.as_retriever(search_kwargs={"k": k * 3})
+                            )
+        retriever = MergerRetriever(retrievers=[compression_retriever, user_compression_retriever])
+    candidate_summary = summarize_candidate(user_resume, user_personal_writeup, job_qualifications)
+
     template = '''
     You are a Senior Career Advisor chatbot designed to assist candidates in preparing for mock interviews 
     based on provided resumes, personal writeup and job qualifications. Your primary functions include:
@@ -108,12 +182,11 @@ def get_qa_chain(db,k,chain_type,user_resume,user_personal_writeup, job_qualific
     You should maintain the confidentiality and privacy of the candidate's information.
     You should adapt advice based on the industry and specific job role the candidate is targeting.
 
-    You can refer to the context to provide strategies and tips for improving the candidate's interview performance: {context}.
-    
-    You can use the following information to generate questions or provide feedback:
-    Job Qualifications: {job_qualifications}
-    User Resume: {resume}
-    User Personal Writeup: {personal_writeup}
+    Candidate Summary: {candidate_summary}
+
+    You can refer to the context to provide strategies and tips for improving the candidate's interview performance. 
+    The context also contains the sections of the candidate's resume, personal writeup and the job qualifications 
+    most relevant to the question, labeled with their source; use them to generate questions or provide feedback: {context}.
 
     Chat History: {chat_history}
     Question: {question}
@@ -123,26 +196,38 @@ def get_qa_chain(db,k,chain_type,user_resume,user_personal_writeup, job_qualific
 
     qa_chain_prompt = PromptTemplate(template=template,
                                     input_variables=["context", "question","chat_history"],
-                                    partial_variables={ 'resume':user_resume,
-                                                        'personal_writeup': user_personal_writeup,
-                                                        'job_qualifications': job_qualifications})
+                                    partial_variables={'candidate_summary': candidate_summary})
 
     # memory = ConversationBufferMemory(memory_key='chat_history',
     #                                   return_messages=True,
     #                                   input_key='question',
     #                                   output_key='answer')
     
+    # Only the answering call streams, and it skips the response cache so a repeated question gets a fresh answer;
+    # condensing the follow-up question stays a plain, cached call
+    answer_llm = get_chat_llm('gpt-3.5-turbo', temperature=0.7, cache=False)
+    if stream_handler is not None:
+        answer_llm = get_chat_llm('gpt-3.5-turbo', temperature=0.7, streaming=True, callbacks=[stream_handler], cache=False)
+
     qa_chain = ConversationalRetrievalChain.from_llm(
-                                            llm=llm_35_turbo,
+                                            llm=answer_llm,
+                                            condense_question_llm=llm_35_turbo,
                                             chain_type=chain_type, #chain_type:stuff, map_reduce, refine
-                                            retriever=compression_retriever,
+                                            retriever=retriever,
                                             combine_docs_chain_kwargs={"prompt": qa_chain_prompt}
     )
     return qa_chain
 
+# Function to create the token-budgeted chat memory
+def new_chat_memory(max_token_limit=CHAT_MEMORY_TOKEN_BUDGET):
+    return RollingChatMemory(llm_35_turbo, max_token_limit=max_token_limit)
+
 # Function to update chat history
 def update_chat_history(chat_history, user_input, bot_response):
-    chat_history.append((user_input, bot_response))
+    if isinstance(chat_history, RollingChatMemory):
+        chat_history.add_turn(user_input, bot_response)
+    else:
+        chat_history.append((user_input, bot_response))
     return chat_history
 
 # Function to print chat history
@@ -159,16 +244,15 @@ def main():
 
     # Load and split documents
     files = file_loading("inputs/")
-    docs = doc_load_split(files)
 
     # Create embeddings and index
-    db = build_vectordb(docs)
+    db = build_vectordb(files)
 
     # User inputs
     resume_input_path = "inputs/resume_AI.docx"
     personal_writeup_input_path = "inputs/skills_profile.docx"
-    user_personal_writeup = docx2txt.process(personal_writeup_input_path)
-    user_resume = docx2txt.process(resume_input_path)
+    user_personal_writeup = parse_document(personal_writeup_input_path)
+    user_resume = parse_document(resume_input_path)
 
     job_qualifications = []
     with open("output/jd.txt", 'r', encoding='utf-8') as file:
@@ -178,7 +262,7 @@ def main():
     if 'chat_history' in st.session_state:
         chat_history = st.session_state['chat_history']
     else:
-        chat_history = []
+        chat_history = new_chat_memory()
 
     # Store generated responses
     if "messages" not in st.session_state.keys():
@@ -190,11 +274,13 @@ def main():
             st.write(message["content"])
 
     # Create QA chain
+    stream_handler = StreamlitTokenHandler()
     qa_chain = get_qa_chain(db, k=3, chain_type="stuff", user_resume=user_resume, 
                             user_personal_writeup=user_personal_writeup, 
                             job_qualifications=job_qualifications,
                             openai_api_key=openai_api_key,
-                            chat_history=chat_history)
+                            chat_history=chat_history,
+                            stream_handler=stream_handler)
 
     if prompt := st.chat_input("How can I help you?"):     
         if prompt is not None:
@@ -204,15 +290,11 @@ def main():
             
             with st.chat_message('assistant'):
                 message_placeholder = st.empty()
-                full_response = ""
-                
-                bot_response = qa_chain.run({"question": prompt, "chat_history": chat_history})
-                # Simulate stream of responsewith milliseconds delay
-                for chunk in re.findall(r'\S+|\n', bot_response):
-                    full_response += chunk + " "
-                    time.sleep(0.05)
-                    message_placeholder.markdown(full_response + "▌")
-                message_placeholder.markdown(full_response)
+
+                # Stream the answer tokens into the placeholder as the LLM generates them
+                stream_handler.start(message_placeholder)
+                bot_response = qa_chain.run({"question": prompt, "chat_history": chat_history.as_chat_history()})
+                message_placeholder.markdown(bot_response)
 
                 # # Get bot response
                 # with st.spinner("Thinking..."):
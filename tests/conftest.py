@@ -0,0 +1,89 @@
+import hashlib
+import os
+import sys
+import uuid
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+
+@pytest.fixture
+def make_embeddings():
+    '''
+    Factory for deterministic offline embeddings with a given model name and dimension
+    '''
+    pytest.importorskip('langchain_core')
+    from langchain_core.embeddings import Embeddings
+
+    class HashEmbeddings(Embeddings):
+        def __init__(self, model, size):
+            self.model = model
+            self.size = size
+            self.calls = 0
+
+        def embed_documents(self, texts):
+            self.calls += 1
+            return [self.vector(text) for text in texts]
+
+        def embed_query(self, text):
+            return self.vector(text)
+
+        def vector(self, text):
+            digest = hashlib.sha256(f'{self.model}:{text}'.encode('utf-8')).digest()
+            return [digest[i % len(digest)] / 255 for i in range(self.size)]
+
+    return HashEmbeddings
+
+
+@pytest.fixture
+def text_files(tmp_path):
+    paths = []
+    for name, text in [('a.txt', 'Tips for behavioural interviews.'), ('b.txt', 'How to negotiate a job offer.')]:
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def load_split():
+    def load(files):
+        from langchain_core.documents import Document
+        docs = []
+        for source in files:
+            with open(source, encoding='utf-8') as f:
+                docs.append(Document(page_content=f.read(), metadata={'source': source}))
+        return docs
+    return load
+
+
+@pytest.fixture
+def stub_stats(monkeypatch, tmp_path):
+    '''
+    Point the OpenAI clients at the local stub server and return its call counters
+    '''
+    from stub_openai_server import StubConfig, start_server
+    server, stats = start_server(StubConfig(latency_ms=0, tokens_per_second=1e6, completion_tokens=5, embedding_latency_ms=0))
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setenv('OPENAI_API_BASE', f'http://127.0.0.1:{server.server_port}/v1')
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    monkeypatch.delenv('JOBFUSION_LLM_CACHE', raising=False)
+    monkeypatch.chdir(tmp_path)
+    yield stats
+    server.shutdown()
+
+
+@pytest.fixture
+def course_page():
+    '''
+    Factory for a course page with a fresh nonce, CSRF token and tracking script, as served per request
+    '''
+    def page(title='Retrieval Augmented Generation'):
+        token = uuid.uuid4().hex
+        return f'''<html><head><meta name="csrf-token" content="{token}"><script nonce="{token}">track("{token}")</script></head>
+        <body data-build="{token}"><h1>{title}</h1><p>Beginner</p><p>1 hour 30 minutes</p>
+        <form><input type="hidden" name="csrf" value="{token}"></form></body></html>'''
+    return page
@@ -0,0 +1,13 @@
+import pytest
+
+pytest.importorskip('bs4')
+
+from tools.course_page_extractor import page_text_hash
+
+
+def test_page_text_hash_ignores_per_request_markup(course_page):
+    assert page_text_hash(course_page()) == page_text_hash(course_page())
+
+
+def test_page_text_hash_changes_with_the_course_text(course_page):
+    assert page_text_hash(course_page()) != page_text_hash(course_page('Building Agentic RAG'))
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip('crewai_tools')
+pytest.importorskip('faiss')
+pytest.importorskip('rank_bm25')
+
+from tools import course_recommendation
+from tools.course_recommendation import CourseRecommendation
+
+
+def test_course_index_version_names_the_underlying_model(tmp_path, monkeypatch, make_embeddings):
+    inventory = tmp_path / 'course_inventory.csv'
+    inventory.write_text('title,level\nIntro to Deep Learning,Beginner\nAdvanced Retrieval,Advanced\n', encoding='latin')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(course_recommendation, 'COURSE_INDEX_DIR', str(tmp_path / 'course_index'))
+
+    versions = []
+    for model, size in [('model-a', 8), ('model-b', 4)]:
+        monkeypatch.setattr(course_recommendation, 'get_embeddings', lambda: make_embeddings(model, size))
+        index = CourseRecommendation().load_index(str(inventory))
+        assert index.version.endswith(f':{model}')
+        assert index.vectordb.index.d == size
+        versions.append(index.version)
+    assert versions[0] != versions[1]
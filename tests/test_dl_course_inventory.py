@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+pytest.importorskip('crewai_tools')
+pytest.importorskip('openpyxl')
+
+import pandas as pd
+from tools import dl_course_inventory
+from tools.dl_course_inventory import CourseDetails, CourseExtractionRunner
+
+URL = 'https://www.deeplearning.ai/short-courses/retrieval-augmented-generation/'
+
+
+class FakeResponse():
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode('utf-8')
+
+
+def test_second_run_skips_unchanged_courses(tmp_path, monkeypatch, course_page):
+    inventory_path = tmp_path / 'course_info.xlsx'
+    pd.DataFrame({'URL': [URL], 'Category': ['Short Course']}).to_excel(inventory_path, index=False)
+    extractions = []
+
+    def run(crew):
+        extractions.append(crew.url)
+        return json.dumps({field: crew.url if field == 'URL' else 'x' for field in CourseDetails.model_fields})
+
+    monkeypatch.setattr(dl_course_inventory.fetcher, 'get', lambda url: FakeResponse(course_page()))
+    monkeypatch.setattr(dl_course_inventory.DLCourseRecCrew, 'run', run)
+    runner = CourseExtractionRunner(inventory_path=str(inventory_path),
+                                    checkpoint_path=str(tmp_path / 'output' / 'extracted.jsonl'),
+                                    output_path=str(tmp_path / 'output' / 'extracted.xlsx'))
+
+    assert len(runner.run()) == 1
+    assert len(runner.run()) == 1
+    assert extractions == [URL]
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+pytest.importorskip('docx2txt')
+
+from tools import document_ingestion
+from tools.document_ingestion import content_hash
+
+
+def test_content_hash_follows_file_changes(tmp_path):
+    path = tmp_path / 'resume.txt'
+    path.write_text('Data analyst, 5 years of SQL.', encoding='utf-8')
+    first = content_hash(str(path))
+    assert content_hash(str(path)) == first
+
+    path.write_text('Data scientist, 6 years of Python.', encoding='utf-8')
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1))
+    assert content_hash(str(path)) != first
+    assert len([key for key in document_ingestion._file_hashes if key == str(path)]) == 1
+
+
+def test_content_hashes_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_ingestion, 'MEMORY_CACHE_SIZE', 3)
+    monkeypatch.setattr(document_ingestion, '_file_hashes', type(document_ingestion._file_hashes)())
+    paths = []
+    for i in range(5):
+        path = tmp_path / f'writeup_{i}.txt'
+        path.write_text(f'Writeup {i}', encoding='utf-8')
+        paths.append(str(path))
+        content_hash(str(path))
+    assert list(document_ingestion._file_hashes) == paths[-3:]
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip('faiss')
+pytest.importorskip('langchain')
+
+from tools import local_embeddings
+from tools.embedding_cache import embedding_model_name, get_cached_embeddings
+from tools.faiss_index import IncrementalFAISSIndex
+from tools.llm_registry import get_embeddings
+
+
+def test_model_name_of_cached_embeddings_is_the_wrapped_model(tmp_path, make_embeddings):
+    cached = get_cached_embeddings(make_embeddings('model-a', 8), cache_dir=str(tmp_path / 'cache'))
+    assert embedding_model_name(cached) == 'model-a'
+
+
+def test_manifest_built_with_another_model_is_not_loaded(tmp_path, make_embeddings, text_files, load_split):
+    cache_dir, index_dir = str(tmp_path / 'cache'), str(tmp_path / 'index')
+    IncrementalFAISSIndex(index_dir, get_cached_embeddings(make_embeddings('model-a', 8), cache_dir)).sync(text_files, load_split)
+
+    same_model = IncrementalFAISSIndex(index_dir, get_cached_embeddings(make_embeddings('model-a', 8), cache_dir))
+    other_model = IncrementalFAISSIndex(index_dir, get_cached_embeddings(make_embeddings('model-b', 4), cache_dir))
+    assert set(same_model.load_manifest()['files']) == set(text_files)
+    assert other_model.load_manifest() == {'embedding_model': 'model-b', 'files': {}}
+
+
+class WordEncoding():
+    def encode(self, text, **kwargs):
+        return [len(word) for word in text.split()]
+
+
+class FakeSentenceTransformer():
+    def encode(self, texts, **kwargs):
+        import numpy as np
+        return np.array([[len(text) % 7 + 1.0] + [1.0] * 383 for text in texts])
+
+
+def test_switching_the_embeddings_backend_rebuilds_the_index(tmp_path, monkeypatch, stub_stats, text_files, load_split):
+    tiktoken = pytest.importorskip('tiktoken')
+    pytest.importorskip('langchain_openai')
+    # Offline stand-ins for tiktoken's downloaded encoding and the sentence_transformers model
+    monkeypatch.setattr(tiktoken, 'encoding_for_model', lambda model: WordEncoding())
+    monkeypatch.setattr(local_embeddings, 'load_encoder', lambda *args: FakeSentenceTransformer())
+    cache_dir, index_dir = str(tmp_path / 'cache'), str(tmp_path / 'index')
+
+    for backend, size in [('openai', 1536), ('local', 384)]:
+        index = IncrementalFAISSIndex(index_dir, get_cached_embeddings(get_embeddings(backend=backend), cache_dir))
+        assert index.load_manifest()['files'] == {}
+        vectordb = index.sync(text_files, load_split)
+        assert vectordb.index.d == size
+        assert vectordb.similarity_search('job offer', k=1)
@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip('faiss')
+pytest.importorskip('rank_bm25')
+
+from langchain_core.documents import Document
+from tools import hybrid_index
+from tools.embedding_cache import embedding_model_name, get_cached_embeddings
+from tools.hybrid_index import HybridIndex
+
+DOCS = [Document(page_content='Python and SQL for data analysis.'), Document(page_content='Led a team of three engineers.')]
+
+
+def load_docs():
+    return list(DOCS)
+
+
+def test_index_is_rebuilt_when_the_embedding_model_changes(tmp_path, make_embeddings):
+    folder = str(tmp_path / 'index')
+    for model, size in [('model-a', 8), ('model-b', 4)]:
+        cached = get_cached_embeddings(make_embeddings(model, size), cache_dir=str(tmp_path / 'cache'))
+        index = HybridIndex(folder, cached, f'{embedding_model_name(cached)}:512:64')
+        assert not index.is_current()
+        index.load_or_build(load_docs)
+        assert index.vectordb.index.d == size
+        assert index.retriever(k=1).get_relevant_documents('team')
+
+
+def test_loaded_indexes_are_bounded_and_old_versions_evicted(tmp_path, monkeypatch, make_embeddings):
+    monkeypatch.setattr(hybrid_index, 'LOADED_INDEX_CACHE_SIZE', 2)
+    monkeypatch.setattr(hybrid_index, '_loaded_indexes', type(hybrid_index._loaded_indexes)())
+    embeddings = make_embeddings('model-a', 8)
+
+    HybridIndex(str(tmp_path / 'course'), embeddings, 'v1').load_or_build(load_docs)
+    HybridIndex(str(tmp_path / 'course'), embeddings, 'v2').load_or_build(load_docs)
+    assert [key[1] for key in hybrid_index._loaded_indexes] == ['v2']
+
+    for name in ('resume', 'writeup'):
+        HybridIndex(str(tmp_path / name), embeddings, 'v1').load_or_build(load_docs)
+    assert len(hybrid_index._loaded_indexes) == 2
+    assert not any(key[0].endswith('course') for key in hybrid_index._loaded_indexes)
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('crewai_tools')
+pytest.importorskip('bs4')
+
+from tools import jd_scraper_tools
+from tools.jd_scraper_tools import fetch_job_description
+
+JD_URL = 'https://boards.greenhouse.io/example/jobs/1'
+
+
+class FakeResponse():
+    def __init__(self, text):
+        self.text = text
+
+
+@pytest.fixture
+def postings(monkeypatch):
+    '''
+    Serve a job posting whose text can be edited between fetches, counting the fetches
+    '''
+    monkeypatch.setattr(jd_scraper_tools, '_job_descriptions', type(jd_scraper_tools._job_descriptions)())
+    posting = {'text': 'Data Analyst: SQL and Python.', 'fetches': 0}
+
+    def get(url):
+        posting['fetches'] += 1
+        return FakeResponse(f'<html><body><div id="content">{posting["text"]}</div></body></html>')
+
+    monkeypatch.setattr(jd_scraper_tools.fetcher, 'get', get)
+    return posting
+
+
+def test_repeated_fetches_within_the_ttl_are_served_from_memory(postings):
+    assert fetch_job_description(JD_URL) == fetch_job_description(JD_URL) == 'Data Analyst: SQL and Python.'
+    assert postings['fetches'] == 1
+
+
+def test_edited_posting_is_refetched_after_the_ttl(postings, monkeypatch):
+    fetch_job_description(JD_URL)
+    postings['text'] = 'Senior Data Analyst: SQL, Python and dbt.'
+    monkeypatch.setattr(jd_scraper_tools, 'JD_CACHE_TTL', 0)
+    assert fetch_job_description(JD_URL) == 'Senior Data Analyst: SQL, Python and dbt.'
+    assert postings['fetches'] == 2
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip('langchain_openai')
+
+from langchain.globals import set_llm_cache
+from tools.llm_cache import bypass_llm_cache
+from tools.llm_registry import get_chat_llm, shared_chat_llm
+
+
+@pytest.fixture
+def llm_stats(stub_stats):
+    # Fresh shared clients and cache for each stub server and working directory
+    shared_chat_llm.cache_clear()
+    set_llm_cache(None)
+    yield stub_stats
+    shared_chat_llm.cache_clear()
+    set_llm_cache(None)
+
+
+def test_default_client_serves_repeated_prompts_from_the_cache(llm_stats):
+    llm = get_chat_llm('gpt-3.5-turbo')
+    first = llm.invoke('Summarize the STAR interview method.')
+    second = llm.invoke('Summarize the STAR interview method.')
+    assert llm_stats.snapshot()['chat_calls'] == 1
+    assert second.content == first.content
+
+
+def test_uncached_client_reaches_the_model_every_time(llm_stats):
+    llm = get_chat_llm('gpt-3.5-turbo', temperature=0.7, cache=False)
+    llm.invoke('Suggest one behavioural interview question.')
+    llm.invoke('Suggest one behavioural interview question.')
+    assert llm_stats.snapshot()['chat_calls'] == 2
+
+
+def test_bypass_skips_the_cache(llm_stats):
+    llm = get_chat_llm('gpt-3.5-turbo')
+    llm.invoke('List three questions to ask an interviewer.')
+    with bypass_llm_cache():
+        llm.invoke('List three questions to ask an interviewer.')
+    assert llm_stats.snapshot()['chat_calls'] == 2
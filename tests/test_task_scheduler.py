@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from tools.task_scheduler import run_task_graph
+
+
+class FakeAgent():
+    def __init__(self, role):
+        self.role = role
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+
+class FakeTask():
+    '''
+    Stand-in for a crewai Task: execute() runs `work` and records when it started and finished
+    '''
+    def __init__(self, agent, work=None, context=None, events=None):
+        self.agent = agent
+        self.context = context
+        self.description = f'{agent.role} task'
+        self.work = work or (lambda: time.sleep(0.01))
+        self.events = events if events is not None else []
+
+    def execute(self):
+        with self.agent._lock:
+            self.agent.running += 1
+            self.agent.max_running = max(self.agent.max_running, self.agent.running)
+        self.events.append(('start', self.agent.role))
+        try:
+            self.work()
+            return f'{self.agent.role} output'
+        finally:
+            self.events.append(('end', self.agent.role))
+            with self.agent._lock:
+                self.agent.running -= 1
+
+
+def test_tasks_run_after_their_context_tasks():
+    events = []
+    research = FakeTask(FakeAgent('researcher'), events=events)
+    profile = FakeTask(FakeAgent('profiler'), events=events)
+    resume = FakeTask(FakeAgent('writer'), context=[research, profile], events=events)
+
+    outputs = run_task_graph([resume, research, profile])
+
+    assert outputs == ['writer output', 'researcher output', 'profiler output']
+    assert events.index(('start', 'writer')) > events.index(('end', 'researcher'))
+    assert events.index(('start', 'writer')) > events.index(('end', 'profiler'))
+
+
+def test_independent_tasks_run_concurrently():
+    # Each task waits for the other to start; run one at a time, the barrier would time out
+    barrier = threading.Barrier(2, timeout=5)
+    tasks = [FakeTask(FakeAgent('researcher'), work=barrier.wait), FakeTask(FakeAgent('profiler'), work=barrier.wait)]
+    assert run_task_graph(tasks) == ['researcher output', 'profiler output']
+
+
+def test_first_failure_is_raised_after_running_tasks_finish():
+    events = []
+    slow_started = threading.Event()
+
+    def fail():
+        slow_started.wait(5)
+        raise RuntimeError('research failed')
+
+    failing = FakeTask(FakeAgent('researcher'), work=fail, events=events)
+    slow = FakeTask(FakeAgent('profiler'), work=lambda: (slow_started.set(), time.sleep(0.2)), events=events)
+    dependent = FakeTask(FakeAgent('writer'), context=[failing], events=events)
+
+    with pytest.raises(RuntimeError, match='research failed'):
+        run_task_graph([failing, slow, dependent])
+    assert ('end', 'profiler') in events
+    assert ('start', 'writer') not in events
+
+
+def test_cycle_raises():
+    first = FakeTask(FakeAgent('researcher'))
+    second = FakeTask(FakeAgent('writer'), context=[first])
+    first.context = [second]
+    with pytest.raises(ValueError, match='cycle'):
+        run_task_graph([first, second])
+
+
+def test_context_task_must_be_scheduled():
+    unscheduled = FakeTask(FakeAgent('researcher'))
+    with pytest.raises(ValueError, match='not scheduled'):
+        run_task_graph([FakeTask(FakeAgent('writer'), context=[unscheduled])])
+
+
+def test_an_agent_never_runs_two_tasks_at_once():
+    agent = FakeAgent('writer')
+    tasks = [FakeTask(agent, work=lambda: time.sleep(0.05)) for _ in range(3)] + [FakeTask(FakeAgent('researcher'))]
+    run_task_graph(tasks, max_workers=4)
+    assert agent.max_running == 1
@@ -0,0 +1,51 @@
+'''
+Token-budgeted chat memory with rolling summarization.
+
+Recent turns are kept verbatim within a token budget; turns that fall out of the budget are folded
+into an incrementally updated summary, so the chat history sent on every turn stays bounded.
+'''
+
+from langchain.memory.prompt import SUMMARY_PROMPT
+from langchain_core.messages import SystemMessage
+
+
+class RollingChatMemory():
+    def __init__(self, llm, max_token_limit=1500):
+        self.llm = llm
+        self.max_token_limit = max_token_limit
+        self.summary = ''
+        self.turns = []
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __iter__(self):
+        return iter(self.turns)
+
+    def format_turns(self, turns):
+        return '\n'.join(f'Human: {user_input}\nAI: {bot_response}' for user_input, bot_response in turns)
+
+    def turns_token_count(self):
+        return self.llm.get_num_tokens(self.format_turns(self.turns)) if self.turns else 0
+
+    def add_turn(self, user_input, bot_response):
+        '''
+        Append a turn; once the verbatim turns exceed the budget, fold the oldest ones into the summary
+        '''
+        self.turns.append((user_input, bot_response))
+        pruned = []
+        while len(self.turns) > 1 and self.turns_token_count() > self.max_token_limit:
+            pruned.append(self.turns.pop(0))
+        if pruned:
+            # Only the newly pruned turns are summarized, on top of the running summary
+            self.summary = self.llm.predict(SUMMARY_PROMPT.format(summary=self.summary, new_lines=self.format_turns(pruned)))
+
+    def as_chat_history(self):
+        '''
+        Chat history for ConversationalRetrievalChain: the running summary followed by the recent turns
+        '''
+        chat_history = []
+        if self.summary:
+            chat_history.append(SystemMessage(content=f'Summary of the earlier conversation: {self.summary}'))
+        chat_history.extend(self.turns)
+        return chat_history
@@ -0,0 +1,64 @@
+'''
+Helpers to run independent LLM tasks concurrently.
+'''
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class AgentPool():
+    '''
+    Hands out one crewai Agent per worker thread, all built by the same factory and sharing its LLM client.
+    Agent.execute_task rebuilds the agent executor on every call, so one Agent must not run two tasks at once.
+    '''
+    def __init__(self, agent_factory):
+        self.agent_factory = agent_factory
+        self._local = threading.local()
+
+    def get(self):
+        if not hasattr(self._local, 'agent'):
+            self._local.agent = self.agent_factory()
+        return self._local.agent
+
+
+class OrderedWriter():
+    '''
+    Writes results to an open file in input order as they arrive in completion order
+    '''
+    def __init__(self, file):
+        self.file = file
+        self.next_index = 0
+        self.pending = {}
+
+    def __call__(self, index, text):
+        self.pending[index] = text
+        while self.next_index in self.pending:
+            text = self.pending.pop(self.next_index)
+            if text is not None:
+                self.file.write(text + '\n')
+            self.next_index += 1
+        self.file.flush()
+
+
+def run_concurrently(fn, items, max_workers=4, on_result=None):
+    '''
+    Call fn(item) for every item on a thread pool of at most max_workers threads.
+    on_result(index, result) is called from the calling thread as each result arrives.
+    Returns the results in input order; a failed item is logged and its result is None.
+    '''
+    items = list(items)
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        futures = {pool.submit(fn, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                print(f'Task {index} failed: {e}')
+            if on_result is not None:
+                on_result(index, results[index])
+    return results
@@ -0,0 +1,188 @@
+'''
+Rule-based extractor for deeplearning.ai course pages.
+
+Parses the Highlights/Content/Syllabus/Audience/Skills sections straight from the HTML using the
+same anchor headings the scraping task gives the LLM. Returns None when a required field cannot be
+found, so the caller can fall back to the LLM crew.
+'''
+
+import hashlib
+import re
+from bs4 import BeautifulSoup
+
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+BLOCK_TAGS = HEADING_TAGS + ['p', 'li', 'dt', 'dd', 'td', 'th', 'div']
+LEVEL_PATTERN = re.compile(r'\b(Beginner|Intermediate|Advanced)\b', re.IGNORECASE)
+LENGTH_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\s*(?:hours?|hrs?|minutes?|mins?|weeks?|months?)(?:\s+\d+\s*(?:minutes?|mins?))?\b', re.IGNORECASE)
+KEYWORD_PATTERN = re.compile(r'\b(?:[A-Z][a-z0-9]*[A-Z][A-Za-z0-9]*|[A-Z]{2,}[a-z]?|Python|JavaScript|PyTorch|TensorFlow)\b')
+
+# Fields that must be found on the page for each category; the rest may be empty
+REQUIRED_FIELDS = {
+    'Short Course': ['Title', 'Level', 'Length', 'Highlights', 'Content', 'Syllabus', 'Skills'],
+    'Course': ['Title', 'Level', 'Length', 'Highlights', 'Content', 'Syllabus', 'Skills'],
+    'Specialization': ['Title', 'Level', 'Length', 'Highlights', 'Content', 'Skills'],
+}
+
+
+def normalize(text):
+    '''
+    Lower-case and drop punctuation so "What you’ll learn" matches "What youll learn"
+    '''
+    text = re.sub(r"['’`]", '', text.lower())
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def page_blocks(html):
+    '''
+    Flatten the page into (heading level, text) blocks in document order; level is 0 for body text
+    '''
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript', 'svg', 'header', 'footer', 'nav', 'form']):
+        tag.decompose()
+
+    blocks = []
+    for element in soup.find_all(BLOCK_TAGS):
+        # Only leaf blocks, so nested containers don't repeat their children's text
+        if element.find(BLOCK_TAGS):
+            continue
+        text = ' '.join(element.get_text(' ').split())
+        if text:
+            level = int(element.name[1]) if element.name in HEADING_TAGS else 0
+            blocks.append((level, text))
+    return blocks
+
+
+def page_text_hash(html):
+    '''
+    Hash of the page's visible text blocks, the extractor's input; per-request markup such as nonces,
+    CSRF tokens or tracking scripts doesn't change it
+    '''
+    digest = hashlib.sha256()
+    for level, text in page_blocks(html):
+        digest.update(f'{level}:{text}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CoursePageExtractor():
+    def __init__(self, html):
+        self.blocks = page_blocks(html)
+        self.normalized = [normalize(text) for _, text in self.blocks]
+        self.full_text = '\n'.join(text for _, text in self.blocks)
+
+    def find(self, *anchors, start=0):
+        '''
+        Index of the first block at or after start that begins with any of the anchors
+        '''
+        anchors = [normalize(anchor) for anchor in anchors]
+        for i in range(start, len(self.blocks)):
+            if any(self.normalized[i].startswith(anchor) for anchor in anchors):
+                return i
+        return None
+
+    def section_end(self, index):
+        '''
+        The section under a heading ends at the next heading of the same or a higher level
+        '''
+        level = self.blocks[index][0] or 6
+        for i in range(index + 1, len(self.blocks)):
+            if 0 < self.blocks[i][0] <= level:
+                return i
+        return len(self.blocks)
+
+    def text_between(self, start, end):
+        return '\n'.join(text for _, text in self.blocks[start:end]).strip()
+
+    def section_after(self, *anchors, until=None):
+        '''
+        Text after the first anchor heading, up to the first `until` anchor or the end of its section
+        '''
+        start = self.find(*anchors)
+        if start is None:
+            return ''
+        end = self.find(*until, start=start + 1) if until else None
+        if end is None:
+            end = self.section_end(start)
+        return self.text_between(start + 1, end)
+
+    def title(self):
+        for level, text in self.blocks:
+            if level == 1:
+                return text
+        return ''
+
+    def level(self):
+        match = LEVEL_PATTERN.search(self.full_text)
+        return match.group(1).capitalize() if match else ''
+
+    def length(self):
+        match = LENGTH_PATTERN.search(self.full_text)
+        return match.group(0) if match else ''
+
+    def instructor(self):
+        index = self.find('Instructors', 'Instructor')
+        if index is None:
+            return ''
+        _, text = self.blocks[index]
+        # "Instructor: Andrew Ng" on one line, or the name in the next block
+        inline = re.sub(r'^instructors?\s*:?\s*', '', text, flags=re.IGNORECASE)
+        if inline:
+            return inline
+        return self.blocks[index + 1][1] if index + 1 < len(self.blocks) else ''
+
+    def skills_from_text(self, text):
+        '''
+        Keywords such as model names, languages, frameworks and acronyms, in order of appearance
+        '''
+        keywords = []
+        for keyword in KEYWORD_PATTERN.findall(text):
+            if keyword not in keywords:
+                keywords.append(keyword)
+        return ', '.join(keywords)
+
+    def extract(self, category):
+        fields = {
+            'Title': self.title(),
+            'Level': self.level(),
+            'Length': self.length(),
+            'Instructor': self.instructor(),
+            'Audience': self.section_after('Who should join', 'Who is this course for'),
+        }
+
+        if category == 'Short Course':
+            learn = self.find('What youll learn in this course')
+            title_index = next((i for i, (level, _) in enumerate(self.blocks) if level == 1), -1)
+            fields['Highlights'] = self.text_between(title_index + 1, learn) if learn is not None else ''
+            fields['Content'] = self.section_after('What youll learn in this course', until=['Who should join'])
+            fields['Syllabus'] = self.section_after('Syllabus', 'Course Outline') or fields['Content']
+            fields['Skills'] = self.skills_from_text(fields['Highlights'] + '\n' + fields['Content'])
+        elif category == 'Course':
+            fields['Highlights'] = self.section_after('What you will learn', until=['skills you will gain'])
+            fields['Content'] = self.section_after('About this course', 'Course description', 'Description')
+            fields['Syllabus'] = self.section_after('Syllabus', until=['Instructors', 'Instructor'])
+            fields['Skills'] = self.section_after('skills you will gain')
+            if not fields['Content']:
+                fields['Content'] = fields['Highlights']
+        elif category == 'Specialization':
+            fields['Highlights'] = self.section_after('What youll get from this course')
+            fields['Content'] = self.section_after('Syllabus', until=['Instructors', 'Instructor', 'skills you will gain'])
+            fields['Syllabus'] = fields['Content']
+            fields['Skills'] = self.section_after('skills you will gain', 'concepts you will learn')
+        else:
+            return None
+
+        missing = [field for field in REQUIRED_FIELDS[category] if not fields[field]]
+        return fields, missing
+
+
+def extract_course_fields(html, url, category):
+    '''
+    Extract the CourseDetails fields from a course page; returns None if any required field is missing
+    '''
+    result = CoursePageExtractor(html).extract(category)
+    if result is None:
+        return None
+    fields, missing = result
+    if missing:
+        print(f'Rule-based extraction incomplete for {url}, missing: {", ".join(missing)}')
+        return None
+    return dict(fields, Category=category, URL=url)
@@ -1,20 +1,20 @@
 import pandas as pd
 import json
 import os
-from langchain_openai import ChatOpenAI
+from tools.llm_registry import get_chat_llm, get_embeddings
 from crewai_tools import BaseTool
 from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
-from langchain.retrievers import BM25Retriever, EnsembleRetriever
+from tools.document_ingestion import content_hash
+from tools.embedding_cache import embedding_model_name, get_cached_embeddings
+from tools.hybrid_index import HybridIndex
 
 from dotenv import load_dotenv
 load_dotenv()
 openai_api_key = os.getenv('OPENAI_API_KEY')
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo') # Loading GPT-3.5-turbo model
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo') # Loading GPT-3.5-turbo model
+COURSE_INDEX_DIR = 'output/course_index'
 
 
 class CourseRecommendation():
@@ -25,13 +25,10 @@ class CourseRecommendation():
         '''
         Select courses from inventory and recommend the top 10 most relevant courses to match users' profile/preferences.
         '''
-        loader = CSVLoader(file_path=file_path, encoding="latin")
-        data = loader.load()
-
-        vectordb = self.build_vectordb(data)
+        index = self.load_index(file_path)
 
         user_profile = pd.read_csv(user_profile_path, encoding="latin")
-        results = self.get_recommendations(data, vectordb, 10, user_profile)['result']
+        results = self.get_recommendations(index, 10, user_profile)['result']
         res = json.loads(results)
         print(res)
     
@@ -45,29 +42,21 @@ class CourseRecommendation():
 
         return df
 
-    def build_vectordb(self, docs):
-        embeddings = OpenAIEmbeddings()
-        # Alternative Approach: HuggingFace embeddings:bge-large
-        # model_name = 'BAAI/bge-large-en'
-        # # model_kwargs = {'device': 'cpu'}
-        # # encode_kwargs = {'normalize_embeddings': True}
-        # embeddings = HuggingFaceEmbeddings(model_name=model_name)
-        vectordb = FAISS.from_documents(docs, embeddings)
-        index_folder_path = 'output/faiss_index'
-        index_name = 'faiss_0'
-        if len(os.listdir(index_folder_path)) == 0:
-            print('Creating FAISS index...')
-            vectordb.save_local(index_folder_path, index_name)
-        else: 
-            print('Loading FAISS index....')
-            vectordb = FAISS.load_local(index_folder_path, embeddings, index_name, allow_dangerous_deserialization=True)
-        return vectordb
-
-    def get_recommendations(self, docs, db, k, user_profile):
-        faiss_retirever = db.as_retriever(search_kwargs={'k': k}, search_type='mmr')
-        bm25_retriever = BM25Retriever.from_documents(docs)
-        bm25_retriever.k=k
-        retriever = EnsembleRetriever(retrievers=[faiss_retirever, bm25_retriever], weights=[0.5, 0.5])
+    def load_index(self, file_path):
+        '''
+        Load the persisted BM25 + FAISS index of the course inventory, stamped with the inventory's content hash and the
+        embedding model; it is rebuilt only when either changes, and then only new or changed rows are embedded
+        '''
+        # Embeddings come from the shared on-disk cache (or the local CPU model with JOBFUSION_EMBEDDINGS=local);
+        # the stamp names the model behind the cache, so switching models rebuilds the index
+        underlying_embeddings = get_embeddings()
+        embeddings = get_cached_embeddings(underlying_embeddings)
+        version = f'{content_hash(file_path)}:{embedding_model_name(underlying_embeddings)}'
+        load_docs = lambda: CSVLoader(file_path=file_path, encoding="latin").load()
+        return HybridIndex(COURSE_INDEX_DIR, embeddings, version).load_or_build(load_docs)
+
+    def get_recommendations(self, index, k, user_profile):
+        retriever = index.retriever(k=k, search_type='mmr')
         
         template = '''
         You are given the full course inventory in the Deep Learning domain. The inventory context includes course level, length, highlights, 
@@ -1,22 +1,26 @@
 # Description: This script is used to extract course information from the provided URLs in the course_info.xlsx file.
 # The script uses the CrewAI platform to create a crew of agents and tasks to extract the course information.
 # env: CourseRecCrew (Python 3.10)
-# python run dl_course_inventory.py
+# python -m tools.dl_course_inventory  (run from the repository root; re-runs resume from output/deeplearning_course_info_extracted.jsonl)
 
 import pandas as pd
 import json
 from dotenv import load_dotenv
 import os
-from langchain_openai import ChatOpenAI
+from tools.llm_registry import get_chat_llm
 from crewai_tools import ScrapeWebsiteTool
 from crewai import Agent, Task, Crew
 from pydantic import BaseModel
 from textwrap import dedent
+import threading
+from tools.http_fetcher import fetcher
+from tools.concurrency import run_concurrently
+from tools.course_page_extractor import extract_course_fields, page_text_hash
 load_dotenv()
 
 openai_api_key = os.getenv('OPENAI_API_KEY')
 # Create the llm
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo')
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo') # Loading GPT-3.5-turbo model
 # llm_45_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-4-turbo')
 # llm = ChatOpenAI(model='gpt-3.5') # Loading GPT-3.5 instead of GPT-4
 scrape_tool = ScrapeWebsiteTool()
@@ -97,11 +101,29 @@ class DLCourseRecTasks():
         )
 
 class DLCourseRecCrew:
-    def __init__(self, url, category):
+    def __init__(self, url, category, html=None):
         self.url = url
         self.category = category
+        self.html = html
+
+    def extract_with_rules(self):
+        '''
+        Parse the course sections straight from the HTML; None when the rules fail or a field is missing
+        '''
+        try:
+            html = self.html if self.html is not None else fetcher.get(self.url).text
+            fields = extract_course_fields(html, self.url, self.category)
+        except Exception as e:
+            print(f'Rule-based extraction failed for {self.url}: {e}')
+            return None
+        return CourseDetails(**fields) if fields is not None else None
 
     def run(self):
+        # Deterministic extraction first; the LLM crew is only the fallback
+        course = self.extract_with_rules()
+        if course is not None:
+            return course.model_dump_json()
+
         # Define your custom agents and tasks in agents.py and tasks.py
         agents = DLCourseRecAgents()
         tasks = DLCourseRecTasks()
@@ -123,24 +145,83 @@ class DLCourseRecCrew:
         return result
 
 
+class CourseExtractionRunner:
+    '''
+    Resumable, concurrent extraction of the course inventory.
+
+    Every extracted CourseDetails record is appended to a JSONL checkpoint as soon as it completes,
+    together with the hash of the visible text of the course page it was extracted from. Re-runs skip
+    URLs whose page text is unchanged, so only missing or changed courses are sent to the crew.
+    '''
+    def __init__(self, inventory_path='course_info.xlsx',
+                 checkpoint_path='output/deeplearning_course_info_extracted.jsonl',
+                 output_path='output/deeplearning_course_info_extracted.xlsx',
+                 max_workers=4):
+        self.inventory_path = inventory_path
+        self.checkpoint_path = checkpoint_path
+        self.output_path = output_path
+        self.max_workers = max_workers
+        self._checkpoint_lock = threading.Lock()
+
+    def load_checkpoint(self):
+        '''
+        Load the extracted records keyed by URL; later records win and a truncated last line is ignored
+        '''
+        records = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    records[record['url']] = record
+        return records
+
+    def append_checkpoint(self, record):
+        with self._checkpoint_lock:
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def extract(self, url, category, checkpoint):
+        response = fetcher.get(url)
+        page_hash = page_text_hash(response.text)
+        if url in checkpoint and checkpoint[url]['page_hash'] == page_hash:
+            return checkpoint[url]
+
+        res = DLCourseRecCrew(url=url, category=category, html=response.text).run()
+        course = CourseDetails(**(res if isinstance(res, dict) else json.loads(res)))
+        record = {'url': url, 'page_hash': page_hash, 'course': course.model_dump()}
+        self.append_checkpoint(record)
+        print(f'Extracted: {url}')
+        return record
+
+    def run(self):
+        inventory = pd.read_excel(self.inventory_path)
+        # Precomputed URL -> category map instead of a DataFrame filter per URL
+        url_category = dict(zip(inventory['URL'], inventory['Category']))
+        checkpoint = self.load_checkpoint()
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+
+        urls = list(url_category)
+        records = run_concurrently(lambda url: self.extract(url, url_category[url], checkpoint), urls, max_workers=self.max_workers)
+        # A course whose re-fetch or re-extraction failed keeps its checkpointed record instead of dropping out of the output
+        for i, url in enumerate(urls):
+            if records[i] is None and url in checkpoint:
+                print(f'Using checkpointed record for {url}')
+                records[i] = checkpoint[url]
+
+        extracted = [record['course'] for record in records if record is not None]
+        print(f'{len(extracted)} of {len(urls)} courses extracted')
+        df = pd.DataFrame(extracted, columns=list(CourseDetails.model_fields))
+        df.to_excel(self.output_path, index=False)
+        return df
+
+
 if __name__ == "__main__":
     print("## Welcome to Course Recommendation Crew")
     print("-------------------------------")
 
-    inventory = pd.read_excel('course_info.xlsx')
-    df = pd.DataFrame(columns = inventory.columns)
-
-    for url in inventory['URL']:
-        course_inputs = {
-            'course_url': url,
-            'course_category': inventory[inventory['URL'] == url]['Category'].values[0]
-        }
-  
-        res = DLCourseRecCrew(
-            url = course_inputs['course_url'], 
-            category = course_inputs['course_category']).run()
-        
-        df_temp = pd.DataFrame.from_dict(json.loads(res), orient='index').T
-        df = pd.concat([df, df_temp])
-
-    df.to_excel('output/deeplearning_course_info_extracted.xlsx', index=False)
\ No newline at end of file
+    CourseExtractionRunner().run()
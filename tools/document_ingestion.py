@@ -0,0 +1,152 @@
+'''
+Document ingestion for uploaded resumes and writeups.
+
+parse_document() turns a docx, pdf or txt file into normalized text. Results are keyed by the file's
+content hash and memoized in memory and under output/parse_cache/, so the same upload is parsed once
+no matter how many tasks, crews or Streamlit reruns read it. Large PDFs are parsed page by page in
+worker processes.
+'''
+
+import multiprocessing
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import docx2txt
+from tools.faiss_index import file_hash
+
+PARSE_CACHE_DIR = 'output/parse_cache'
+PARSER_VERSION = 1  # bump when parsing or normalization changes, so stale cache files are ignored
+MEMORY_CACHE_SIZE = 64
+PDF_WORKER_MIN_PAGES = 20  # smaller PDFs are parsed in-process
+PDF_PAGES_PER_WORKER_BATCH = 10
+
+_parsed = OrderedDict()
+_file_hashes = OrderedDict()  # absolute path -> ((size, mtime), content hash), most recently used last
+_lock = threading.Lock()
+
+
+def normalize_text(text):
+    '''
+    Unicode NFC, plain spaces and newlines, no trailing spaces and at most one blank line in a row
+    '''
+    text = unicodedata.normalize('NFC', text).replace('\r\n', '\n').replace('\r', '\n')
+    text = text.replace('\xa0', ' ').replace('\u200b', '').replace('\t', ' ')
+    lines = [re.sub(r' {2,}', ' ', line).strip() for line in text.split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def document_type(file_path):
+    '''
+    Tell the format from the file's leading bytes, falling back to the extension
+    '''
+    with open(file_path, 'rb') as f:
+        head = f.read(5)
+    if head.startswith(b'%PDF'):
+        return 'pdf'
+    if head.startswith(b'PK') and file_path.lower().endswith('.docx'):
+        return 'docx'
+    return os.path.splitext(file_path)[1].lower().lstrip('.') or 'txt'
+
+
+def parse_txt(file_path):
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def parse_pdf_pages(file_path, start, end):
+    '''
+    Text of pages [start, end) of a PDF; runs in a worker process for large PDFs
+    '''
+    from pypdf import PdfReader
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() or '' for i in range(start, end)]
+
+
+def parse_pdf(file_path):
+    from pypdf import PdfReader
+    page_count = len(PdfReader(file_path).pages)
+    if page_count < PDF_WORKER_MIN_PAGES:
+        pages = parse_pdf_pages(file_path, 0, page_count)
+    else:
+        batches = [(start, min(start + PDF_PAGES_PER_WORKER_BATCH, page_count))
+                   for start in range(0, page_count, PDF_PAGES_PER_WORKER_BATCH)]
+        # Spawned workers: forking the threaded Streamlit/crew process can copy held locks and deadlock
+        with ProcessPoolExecutor(max_workers=min(len(batches), os.cpu_count() or 1),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(parse_pdf_pages, file_path, start, end) for start, end in batches]
+            pages = [page for future in futures for page in future.result()]
+    return '\n\n'.join(pages)
+
+
+PARSERS = {
+    'docx': docx2txt.process,
+    'pdf': parse_pdf,
+    'txt': parse_txt,
+    'md': parse_txt,
+}
+
+
+def content_hash(file_path):
+    '''
+    Content hash of a file, recomputed only when its size or modification time changes
+    '''
+    stat = os.stat(file_path)
+    path, version = os.path.abspath(file_path), (stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        if path in _file_hashes and _file_hashes[path][0] == version:
+            _file_hashes.move_to_end(path)
+            return _file_hashes[path][1]
+
+    # Hashed outside the lock, so other ingestion threads don't wait on this file's IO
+    digest = file_hash(file_path)
+    with _lock:
+        _file_hashes[path] = (version, digest)
+        _file_hashes.move_to_end(path)
+        while len(_file_hashes) > MEMORY_CACHE_SIZE:
+            _file_hashes.popitem(last=False)
+    return digest
+
+
+def remember(key, text):
+    with _lock:
+        _parsed[key] = text
+        _parsed.move_to_end(key)
+        while len(_parsed) > MEMORY_CACHE_SIZE:
+            _parsed.popitem(last=False)
+    return text
+
+
+def parse_document(file_path, cache_dir=PARSE_CACHE_DIR):
+    '''
+    Normalized text of a docx, pdf or txt file, from the in-memory or on-disk cache when the content was parsed before
+    '''
+    key = content_hash(file_path)
+    with _lock:
+        if key in _parsed:
+            _parsed.move_to_end(key)
+            return _parsed[key]
+
+    cache_path = os.path.join(cache_dir, f'{key}.v{PARSER_VERSION}.txt')
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return remember(key, f.read())
+
+    file_type = document_type(file_path)
+    if file_type not in PARSERS:
+        raise ValueError(f'Unsupported document type: {file_path}')
+    print(f'Parsing {file_path} ({file_type})')
+    text = normalize_text(PARSERS[file_type](file_path))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{cache_path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+    return remember(key, text)
@@ -0,0 +1,74 @@
+'''
+Search an uploaded document with a local hybrid (BM25 + embeddings) index.
+
+The index is keyed by the file's content hash and persisted under output/doc_index/, so the same
+resume or writeup is indexed once and reused by every agent, crew run and session.
+'''
+
+import os
+from typing import Any, Optional, Type
+from pydantic.v1 import BaseModel, Field
+from crewai_tools import BaseTool
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from tools.embedding_cache import embedding_model_name, get_cached_embeddings
+from tools.document_ingestion import content_hash, parse_document
+from tools.hybrid_index import HybridIndex
+
+DOC_INDEX_DIR = 'output/doc_index'
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 64
+
+
+def document_index(file_path, index_dir=DOC_INDEX_DIR):
+    '''
+    Load or build the hybrid index of a document, keyed by its content hash
+    '''
+    file_content_hash = content_hash(file_path)
+    embeddings = get_cached_embeddings()
+    version = f'{embedding_model_name(embeddings)}:{CHUNK_SIZE}:{CHUNK_OVERLAP}'
+
+    def load_docs():
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        source = os.path.basename(file_path)
+        chunks = text_splitter.split_text(parse_document(file_path)) or ['']
+        return [Document(page_content=chunk, metadata={'source': source, 'position': i}) for i, chunk in enumerate(chunks)]
+
+    return HybridIndex(os.path.join(index_dir, file_content_hash), embeddings, version).load_or_build(load_docs)
+
+
+class FixedDocumentSearchToolSchema(BaseModel):
+    """Input for DocumentSearchTool."""
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the document's content")
+
+
+class DocumentSearchToolSchema(FixedDocumentSearchToolSchema):
+    """Input for DocumentSearchTool."""
+    document: str = Field(..., description="Mandatory path of the document you want to search")
+
+
+class DocumentSearchTool(BaseTool):
+    name: str = "Search a document's content"
+    description: str = "A tool that can be used to semantic search a query from a document's content."
+    args_schema: Type[BaseModel] = DocumentSearchToolSchema
+    document: Optional[str] = None
+    k: int = 4
+
+    def __init__(self, document: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        if document is not None:
+            self.document = document
+            self.description = f"A tool that can be used to semantic search a query the {os.path.basename(document)} document's content."
+            self.args_schema = FixedDocumentSearchToolSchema
+            self._generate_description()
+
+    def _run(self, search_query: str, **kwargs: Any) -> Any:
+        '''
+        Return the document chunks most relevant to the query
+        '''
+        document = kwargs.get('document', self.document)
+        try:
+            docs = document_index(document).retriever(k=self.k).get_relevant_documents(search_query)
+        except Exception as e:
+            return f'Failed to search {document}: {e}'
+        return '\n\n'.join(doc.page_content for doc in docs)
@@ -0,0 +1,39 @@
+'''
+Shared on-disk embedding cache for all FAISS vector stores.
+
+Embeddings are stored under output/embedding_cache/<embedding model>/<chunk text hash>,
+so only new or changed chunks are sent to the embedding API.
+'''
+
+import re
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
+
+EMBEDDING_CACHE_DIR = 'output/embedding_cache'
+
+
+def embedding_model_name(embeddings):
+    '''
+    Get the model name of an embeddings client, used as the cache namespace and in index version stamps;
+    a CacheBackedEmbeddings wrapper reports the model it wraps
+    '''
+    embeddings = getattr(embeddings, 'underlying_embeddings', embeddings)
+    for attr in ('model', 'model_name'):
+        name = getattr(embeddings, attr, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(embeddings).__name__
+
+
+def get_cached_embeddings(underlying_embeddings=None, cache_dir=EMBEDDING_CACHE_DIR):
+    '''
+    Wrap an embeddings client with a content-addressed cache keyed by (embedding model, chunk text hash)
+    '''
+    if underlying_embeddings is None:
+        from tools.llm_registry import get_embeddings
+        underlying_embeddings = get_embeddings()
+
+    # LocalFileStore keys only allow [a-zA-Z0-9_.-/]; one sub-folder per model
+    namespace = re.sub(r'[^a-zA-Z0-9_.\-]', '_', embedding_model_name(underlying_embeddings)) + '/'
+    store = LocalFileStore(cache_dir)
+    return CacheBackedEmbeddings.from_bytes_store(underlying_embeddings, store, namespace=namespace)
@@ -0,0 +1,118 @@
+'''
+Incremental FAISS index maintenance.
+
+A manifest next to the saved index records each source file's content hash and the IDs of
+its chunks, so ingestion only adds, replaces or deletes the chunks of files that changed.
+langchain is imported inside the methods, so file_hash() stays cheap to import.
+'''
+
+import hashlib
+import json
+import os
+
+
+def file_hash(file_path):
+    '''
+    Get the sha256 hash of a file's content
+    '''
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def chunk_id(source, source_hash, position):
+    '''
+    Deterministic ID of the n-th chunk of a source file version
+    '''
+    return hashlib.sha1(f'{source}:{source_hash}:{position}'.encode('utf-8')).hexdigest()
+
+
+class IncrementalFAISSIndex():
+    def __init__(self, index_folder_path, embeddings, index_name='faiss_0'):
+        self.index_folder_path = index_folder_path
+        self.index_name = index_name
+        self.embeddings = embeddings
+        self.manifest_path = os.path.join(index_folder_path, index_name + '_manifest.json')
+
+    def load_manifest(self):
+        '''
+        Load the manifest; a missing manifest or a different embedding model means nothing is indexed yet
+        '''
+        from tools.embedding_cache import embedding_model_name
+        model = embedding_model_name(self.embeddings)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('embedding_model') == model:
+                return manifest
+        return {'embedding_model': model, 'files': {}}
+
+    def save_manifest(self, manifest):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def load_index(self):
+        if not os.path.exists(os.path.join(self.index_folder_path, self.index_name + '.faiss')):
+            return None
+        from langchain_community.vectorstores import FAISS
+        return FAISS.load_local(self.index_folder_path, self.embeddings, self.index_name, allow_dangerous_deserialization=True)
+
+    def sync(self, files, load_split):
+        '''
+        Bring the index in line with the given source files and return it.
+        load_split maps a list of file paths to split Documents (e.g. doc_load_split); it is only
+        called for files that are new or changed since the last sync.
+        '''
+        os.makedirs(self.index_folder_path, exist_ok=True)
+        manifest = self.load_manifest()
+        vectordb = self.load_index() if manifest['files'] else None
+        if vectordb is None:
+            manifest['files'] = {}
+
+        current_hashes = {source: file_hash(source) for source in files}
+        stale_sources = [source for source, entry in manifest['files'].items()
+                         if current_hashes.get(source) != entry['hash']]
+        changed_sources = [source for source, source_hash in current_hashes.items()
+                           if manifest['files'].get(source, {}).get('hash') != source_hash]
+
+        if not stale_sources and not changed_sources:
+            print('FAISS index is up to date ({} files)'.format(len(current_hashes)))
+            return vectordb
+
+        # Drop the chunks of deleted or changed files
+        stale_ids = []
+        for source in stale_sources:
+            stale_ids.extend(manifest['files'].pop(source)['chunk_ids'])
+        indexed_ids = set(vectordb.index_to_docstore_id.values()) if vectordb is not None else set()
+        stale_ids = [id_ for id_ in stale_ids if id_ in indexed_ids]
+        if stale_ids:
+            vectordb.delete(stale_ids)
+        print('Removed {} chunks from {} stale files'.format(len(stale_ids), len(stale_sources)))
+
+        # Embed and add the chunks of new or changed files
+        docs, ids = [], []
+        for source in changed_sources:
+            manifest['files'][source] = {'hash': current_hashes[source], 'chunk_ids': []}
+        if changed_sources:
+            for doc in load_split(changed_sources):
+                entry = manifest['files'][doc.metadata['source']]
+                new_id = chunk_id(doc.metadata['source'], entry['hash'], len(entry['chunk_ids']))
+                entry['chunk_ids'].append(new_id)
+                docs.append(doc)
+                ids.append(new_id)
+        if docs:
+            if vectordb is None:
+                from langchain_community.vectorstores import FAISS
+                vectordb = FAISS.from_documents(docs, self.embeddings, ids=ids)
+            else:
+                vectordb.add_documents(docs, ids=ids)
+        print('Added {} chunks from {} new or changed files'.format(len(docs), len(changed_sources)))
+
+        if vectordb is not None:
+            vectordb.save_local(self.index_folder_path, self.index_name)
+        self.save_manifest(manifest)
+        return vectordb
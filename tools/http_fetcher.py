@@ -0,0 +1,71 @@
+'''
+Shared HTTP fetcher for the scraping tools.
+
+One pooled requests.Session with retries and exponential backoff, plus per-host politeness
+limits (max concurrent requests and a minimum interval between requests to the same host).
+Safe to share across worker threads.
+'''
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; JobFusionBot/1.0)'}
+
+
+class PoliteFetcher():
+    def __init__(self, max_per_host=4, min_interval=0.2, retries=3, backoff_factor=0.5, pool_size=32, timeout=30):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+        self._host_next_time = defaultdict(float)
+
+    @contextmanager
+    def _host_slot(self, host):
+        with self._lock:
+            slot = self._host_slots[host]
+        with slot:
+            # Reserve the next start time for this host so requests are spaced by min_interval
+            with self._lock:
+                start_time = max(time.monotonic(), self._host_next_time[host])
+                self._host_next_time[host] = start_time + self.min_interval
+            delay = start_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+    def get(self, url, **kwargs):
+        '''
+        GET a URL within the per-host limits; raises requests.HTTPError once retries are exhausted
+        '''
+        kwargs.setdefault('timeout', self.timeout)
+        with self._host_slot(urlparse(url).netloc):
+            response = self.session.get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+
+# Process-wide fetcher shared by all scraping tools
+fetcher = PoliteFetcher()
@@ -0,0 +1,127 @@
+'''
+Persisted hybrid (BM25 + FAISS) retrieval index.
+
+Both halves are saved in one folder together with a version stamp. A folder whose stamp no longer
+matches (the source content or the embedding model changed) is rebuilt instead of loaded. The
+most recently used indexes are kept in memory so every session in the process shares them; loading
+a new version of a folder evicts the old one.
+'''
+
+import json
+import os
+import pickle
+import shutil
+import threading
+import zlib
+from collections import OrderedDict
+from langchain.retrievers import BM25Retriever, EnsembleRetriever
+from langchain_community.vectorstores import FAISS
+
+LOADED_INDEX_CACHE_SIZE = 32
+_loaded_indexes = OrderedDict()  # (folder, version) -> HybridIndex, least recently used first
+_loaded_indexes_lock = threading.Lock()
+_folder_locks = [threading.Lock() for _ in range(64)]
+
+
+def folder_lock(index_folder_path):
+    '''
+    Lock for an index folder, so concurrent sessions build a given index only once.
+    Folders hash onto a fixed set of locks, so the lock table does not grow with every document.
+    '''
+    folder = os.path.abspath(index_folder_path)
+    return _folder_locks[zlib.crc32(folder.encode('utf-8')) % len(_folder_locks)]
+
+
+def cached_index(key):
+    with _loaded_indexes_lock:
+        index = _loaded_indexes.get(key)
+        if index is not None:
+            _loaded_indexes.move_to_end(key)
+        return index
+
+
+def remember_index(key, index):
+    '''
+    Keep a loaded index in memory, dropping older versions of its folder and then the least recently used indexes
+    '''
+    with _loaded_indexes_lock:
+        for superseded in [cached_key for cached_key in _loaded_indexes if cached_key[0] == key[0]]:
+            del _loaded_indexes[superseded]
+        _loaded_indexes[key] = index
+        while len(_loaded_indexes) > LOADED_INDEX_CACHE_SIZE:
+            _loaded_indexes.popitem(last=False)
+
+
+class HybridIndex():
+    def __init__(self, index_folder_path, embeddings, version, bm25_weight=0.5):
+        self.index_folder_path = index_folder_path
+        self.embeddings = embeddings
+        self.version = version
+        self.bm25_weight = bm25_weight
+        self.bm25_retriever = None
+        self.vectordb = None
+
+    def stamp_path(self, folder=None):
+        return os.path.join(folder or self.index_folder_path, 'version.json')
+
+    def is_current(self):
+        '''
+        Whether the saved index was built for this version
+        '''
+        if not os.path.exists(self.stamp_path()):
+            return False
+        with open(self.stamp_path(), 'r', encoding='utf-8') as f:
+            return json.load(f).get('version') == self.version
+
+    def build(self, docs):
+        '''
+        Build both indexes from the documents and save them; the stamp is written last, and the folder is swapped in whole
+        '''
+        print(f'Building hybrid index in {self.index_folder_path} ({len(docs)} chunks)...')
+        self.bm25_retriever = BM25Retriever.from_documents(docs)
+        self.vectordb = FAISS.from_documents(docs, self.embeddings)
+
+        tmp_folder = f'{self.index_folder_path}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        os.makedirs(tmp_folder)
+        self.vectordb.save_local(tmp_folder, 'faiss')
+        with open(os.path.join(tmp_folder, 'bm25.pkl'), 'wb') as f:
+            pickle.dump(self.bm25_retriever, f)
+        with open(self.stamp_path(tmp_folder), 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'chunks': len(docs)}, f)
+
+        shutil.rmtree(self.index_folder_path, ignore_errors=True)
+        os.replace(tmp_folder, self.index_folder_path)
+        return self
+
+    def load(self):
+        self.vectordb = FAISS.load_local(self.index_folder_path, self.embeddings, 'faiss', allow_dangerous_deserialization=True)
+        with open(os.path.join(self.index_folder_path, 'bm25.pkl'), 'rb') as f:
+            self.bm25_retriever = pickle.load(f)
+        return self
+
+    def load_or_build(self, load_docs):
+        '''
+        Reuse the index already in memory or on disk for this version; otherwise call load_docs() and build it
+        '''
+        key = (os.path.abspath(self.index_folder_path), self.version)
+        with folder_lock(self.index_folder_path):
+            index = cached_index(key)
+            if index is not None:
+                return index
+            if self.is_current():
+                print(f'Loading hybrid index from {self.index_folder_path}')
+                self.load()
+            else:
+                self.build(load_docs())
+            remember_index(key, self)
+            return self
+
+    def retriever(self, k=4, search_type='similarity'):
+        '''
+        Ensemble retriever fusing BM25 and FAISS results with reciprocal rank fusion
+        '''
+        bm25_retriever = self.bm25_retriever.copy(update={'k': k})
+        faiss_retriever = self.vectordb.as_retriever(search_type=search_type, search_kwargs={'k': k})
+        return EnsembleRetriever(retrievers=[bm25_retriever, faiss_retriever],
+                                 weights=[self.bm25_weight, 1 - self.bm25_weight])
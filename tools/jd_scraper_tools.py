@@ -1,68 +1,193 @@
 '''
-Scrape webpage content from the deeplearning.ai blog
-Summarize the major findings from Andrew's newsletters.
+Scrape the job description from a job posting URL.
+Returns only the posting text, using schema.org JobPosting JSON-LD or per-domain extraction rules,
+so the researcher agent gets a small and clean input instead of the whole page.
 '''
 
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from datetime import datetime
-from crewai import Agent, Task
-from langchain.tools import tool
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Type
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from pydantic.v1 import BaseModel, Field
 from crewai_tools import BaseTool
-import streamlit as st
-__import__('pysqlite3')
-import sys
-sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+from tools.http_fetcher import fetcher
 
+MAX_JD_CHARS = 20000
+JD_CACHE_TTL = float(os.getenv('JOBFUSION_JD_CACHE_TTL', 15 * 60))  # seconds
+JD_CACHE_SIZE = 64
 
-os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"] 
-openai_api_key = st.secrets["OPENAI_API_KEY"]
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo') # Loading GPT-3.5-turbo model
+_job_descriptions = OrderedDict()  # jd_url -> (fetched at, posting text), most recently used last
+_job_descriptions_lock = threading.Lock()
 
-class JDScraperTools(BaseTool):
-    name: str = 'Scrape the content of job description'
-    description: str = ('A tool to scrape the job description content for given position URL. ')
+# Per-domain CSS selectors for the job description, tried in order.
+# Keys match the end of the host name, so 'boards.greenhouse.io' uses the 'greenhouse.io' rules.
+DOMAIN_RULES = {
+    'greenhouse.io': ['#content', '.job__description', '#app_body'],
+    'lever.co': ['[data-qa="job-description"]', '.posting-page .section-wrapper.page-full-width', '.posting-page'],
+    'ashbyhq.com': ['[class*="descriptionText"]', '[class*="jobPostingDescription"]'],
+    'myworkdayjobs.com': ['[data-automation-id="jobPostingDescription"]'],
+    'smartrecruiters.com': ['.job-sections', '[itemprop="description"]'],
+    'workable.com': ['[data-ui="job-description"]', '[data-ui="job-requirements"]'],
+    'icims.com': ['.iCIMS_JobContent', '.iCIMS_InfoMsg_Job'],
+    'jobvite.com': ['.jv-job-detail-description'],
+    'linkedin.com': ['.show-more-less-html__markup', '.description__text'],
+    'indeed.com': ['#jobDescriptionText'],
+    'glassdoor.com': ['[class*="JobDetails_jobDescription"]', '#JobDescriptionContainer'],
+}
 
-    def __generate_web_content(self,jd_url):
-        '''
-        Get the article content from its URL
-        '''
-        # Send a GET request to the page
-        response = requests.get(jd_url)
-        # Parse the page content
-        soup = BeautifulSoup(response.content, 'html.parser')
+# Generic fallbacks for sites without a rule
+GENERIC_SELECTORS = ['[itemprop="description"]', 'div[class*="prose"]', '[class*="job-description"]',
+                     '[class*="jobDescription"]', '[id*="job-description"]', 'main', 'article']
 
-        def has_prose_in_class(html_tag):
-            return html_tag.name == 'div' and html_tag.has_attr('class') and 'prose' in ' '.join(html_tag['class'])
+JOB_POSTING_FIELDS = ['qualifications', 'responsibilities', 'skills', 'experienceRequirements',
+                      'educationRequirements', 'employmentType']
 
-        # Find the article content
-        article_content_div = soup.find(has_prose_in_class)
 
-        # Extract the text from the div
-        article_body = article_content_div.get_text()
+LINE_BREAK_TAGS = ['p', 'div', 'br', 'li', 'tr', 'ul', 'ol', 'section', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
 
-        return article_body
-    
-    # @tool('deeplearning.ai top voice scraping and summarization')
-    def _run(self, jd_url: str) -> str:
-        '''
-        Scrape the job desription and position qualifications based on the given position URL.
-        '''
-        article_content_list = []
-        article_content = self.__generate_web_content(jd_url)
-        article_content_list.append(article_content)
 
-        articles_urls_dict = {}
-        articles_urls_dict['content'] = article_content_list
+def html_to_text(html):
+    '''
+    Plain text with one line per block element and bulleted list items
+    '''
+    soup = html if hasattr(html, 'get_text') else BeautifulSoup(html, 'html.parser')
+    for tag in soup.find_all(LINE_BREAK_TAGS):
+        if tag.name == 'li':
+            tag.insert(0, '- ')
+        tag.append('\n')
+    lines = (' '.join(line.split()) for line in soup.get_text().split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def find_job_posting(data):
+    '''
+    Find the JobPosting object in a JSON-LD payload (a dict, a list or an @graph)
+    '''
+    if isinstance(data, list):
+        for item in data:
+            posting = find_job_posting(item)
+            if posting:
+                return posting
+    elif isinstance(data, dict):
+        types = data.get('@type')
+        if types == 'JobPosting' or (isinstance(types, list) and 'JobPosting' in types):
+            return data
+        if '@graph' in data:
+            return find_job_posting(data['@graph'])
+    return None
+
+
+def extract_json_ld(soup):
+    '''
+    Posting text from schema.org JobPosting JSON-LD, or None
+    '''
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            posting = find_job_posting(json.loads(script.string or ''))
+        except json.JSONDecodeError:
+            continue
+        if not posting or not posting.get('description'):
+            continue
+
+        sections = [posting.get('title', '')]
+        organization = posting.get('hiringOrganization')
+        if isinstance(organization, dict) and organization.get('name'):
+            sections.append(f"Company: {organization['name']}")
+        sections.append(html_to_text(posting['description']))
+        for field in JOB_POSTING_FIELDS:
+            value = posting.get(field)
+            if isinstance(value, str) and value.strip():
+                sections.append(f'{field}: {html_to_text(value)}')
+        return '\n\n'.join(section for section in sections if section)
+    return None
+
+
+def extract_with_selectors(soup, selectors):
+    for selector in selectors:
+        elements = soup.select(selector)
+        text = '\n\n'.join(html_to_text(element) for element in elements).strip()
+        if text:
+            return text
+    return None
+
 
-            # Convert the dictionary to a dataframe and append it to the list
-        df = pd.DataFrame(articles_urls_dict)
-        df_list.append(df)
+def domain_selectors(jd_url):
+    host = urlparse(jd_url).netloc.lower()
+    for domain, selectors in DOMAIN_RULES.items():
+        if host == domain or host.endswith('.' + domain):
+            return selectors
+    return []
 
-        return "\n\n".join(important_findings)
 
+def extract_job_description(html, jd_url):
+    '''
+    Extract the job posting text from a page: JSON-LD first, then the domain rules, then generic selectors
+    '''
+    soup = BeautifulSoup(html, 'html.parser')
+    text = extract_json_ld(soup)
+    if not text:
+        for tag in soup(['script', 'style', 'noscript', 'svg', 'header', 'footer', 'nav', 'form']):
+            tag.decompose()
+        text = (extract_with_selectors(soup, domain_selectors(jd_url))
+                or extract_with_selectors(soup, GENERIC_SELECTORS)
+                or html_to_text(soup.body or soup))
+    return text[:MAX_JD_CHARS]
+
+
+def fetch_job_description(jd_url):
+    '''
+    The posting text of a job URL; fetches within JD_CACHE_TTL seconds of each other reuse the last one,
+    so an edited or removed posting is picked up after at most that long
+    '''
+    with _job_descriptions_lock:
+        cached = _job_descriptions.get(jd_url)
+        if cached is not None and time.monotonic() - cached[0] < JD_CACHE_TTL:
+            _job_descriptions.move_to_end(jd_url)
+            return cached[1]
+
+    text = extract_job_description(fetcher.get(jd_url).text, jd_url)
+    with _job_descriptions_lock:
+        _job_descriptions[jd_url] = (time.monotonic(), text)
+        _job_descriptions.move_to_end(jd_url)
+        while len(_job_descriptions) > JD_CACHE_SIZE:
+            _job_descriptions.popitem(last=False)
+    return text
+
+
+class FixedJDScraperToolsSchema(BaseModel):
+    """Input for JDScraperTools."""
+    pass
+
+
+class JDScraperToolsSchema(FixedJDScraperToolsSchema):
+    """Input for JDScraperTools."""
+    jd_url: str = Field(..., description="Mandatory URL of the job posting")
+
+
+class JDScraperTools(BaseTool):
+    name: str = 'Scrape the content of job description'
+    description: str = ('A tool to scrape the job description content for given position URL. ')
+    args_schema: Type[BaseModel] = JDScraperToolsSchema
+    jd_url: Optional[str] = None
+
+    def __init__(self, jd_url: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        if jd_url is not None:
+            self.jd_url = jd_url
+            self.description = f"A tool to scrape the job description content of {jd_url}."
+            self.args_schema = FixedJDScraperToolsSchema
+            self._generate_description()
+
+    def _run(self, **kwargs: Any) -> Any:
+        '''
+        Scrape the job desription and position qualifications based on the given position URL.
+        '''
+        jd_url = kwargs.get('jd_url', self.jd_url)
+        try:
+            return fetch_job_description(jd_url.strip())
+        except Exception as e:
+            return f'Failed to fetch the job description from {jd_url}: {e}'
@@ -0,0 +1,124 @@
+'''
+Background job queue for crew runs.
+
+Crew runs are submitted to a worker pool and get a job ID right away. Each job's status and per-task
+progress is written to output/jobs/<job id>.json, so the Streamlit UI can poll it across reruns and
+browser reconnects instead of blocking the script thread for minutes.
+'''
+
+import json
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOBS_DIR = 'output/jobs'
+FINISHED_STATES = ('succeeded', 'failed', 'interrupted')
+SERVER_ID = uuid.uuid4().hex  # tells this server process apart from an earlier one that had the same pid
+
+
+def process_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Job():
+    def __init__(self, manager, job_id, kind, total_tasks):
+        self.manager = manager
+        self.record = {
+            'job_id': job_id,
+            'kind': kind,
+            'pid': os.getpid(),
+            'server_id': SERVER_ID,
+            'status': 'queued',
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'total_tasks': total_tasks,
+            'completed_tasks': [],
+            'error': None,
+        }
+
+    def update(self, **fields):
+        self.record.update(fields)
+        self.manager.save(self.record)
+
+    def task_done(self, task_output):
+        '''
+        crewai task callback: record each finished task
+        '''
+        description = getattr(task_output, 'summary', None) or getattr(task_output, 'description', '')
+        completed_tasks = self.record['completed_tasks'] + [{'task': str(description).strip()[:120], 'finished_at': time.time()}]
+        self.update(completed_tasks=completed_tasks)
+
+
+class JobManager():
+    def __init__(self, max_workers=4, jobs_dir=JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crew-job')
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.mark_interrupted()
+
+    def job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f'{job_id}.json')
+
+    def save(self, record):
+        with self._lock:
+            tmp_path = self.job_path(record['job_id']) + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, indent=2)
+            os.replace(tmp_path, self.job_path(record['job_id']))
+
+    def get(self, job_id):
+        '''
+        The job's status record, or None for an unknown job ID
+        '''
+        # Job IDs come back from the URL, so only accept the IDs submit() hands out
+        if not job_id or not re.fullmatch(r'[0-9a-f]{32}', job_id) or not os.path.exists(self.job_path(job_id)):
+            return None
+        with self._lock, open(self.job_path(job_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def mark_interrupted(self):
+        '''
+        Jobs left queued or running by a server process that no longer exists will never finish
+        '''
+        for file_name in os.listdir(self.jobs_dir):
+            if not file_name.endswith('.json'):
+                continue
+            record = self.get(file_name[:-len('.json')])
+            if record is None or record['status'] in FINISHED_STATES or record.get('server_id') == SERVER_ID:
+                continue
+            if record.get('pid') == os.getpid() or not process_alive(record.get('pid')):
+                record.update(status='interrupted', finished_at=time.time(), error='The server restarted before the job finished.')
+                self.save(record)
+
+    def submit(self, kind, fn, *args, total_tasks=None, **kwargs):
+        '''
+        Run fn(*args, task_callback=..., **kwargs) on the worker pool and return the job ID right away
+        '''
+        job = Job(self, uuid.uuid4().hex, kind, total_tasks)
+        job.update()
+        self.pool.submit(self.run_job, job, fn, args, kwargs)
+        print(f'Submitted {kind} job {job.record["job_id"]}')
+        return job.record['job_id']
+
+    def run_job(self, job, fn, args, kwargs):
+        job.update(status='running', started_at=time.time())
+        try:
+            fn(*args, task_callback=job.task_done, **kwargs)
+            job.update(status='succeeded', finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            job.update(status='failed', finished_at=time.time(), error=str(e))
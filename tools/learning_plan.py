@@ -2,22 +2,21 @@ import pandas as pd
 import json
 import os
 from textwrap import dedent
-from langchain_openai import ChatOpenAI
+from tools.llm_registry import get_chat_llm
 from crewai_tools import BaseTool
 from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
 from langchain.retrievers import BM25Retriever, EnsembleRetriever
 from crewai import Agent, Task, Crew
 from pydantic import BaseModel
+from tools.concurrency import AgentPool, run_concurrently
 
 from dotenv import load_dotenv
 load_dotenv()
 openai_api_key = os.getenv('OPENAI_API_KEY')
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo') # Loading GPT-3.5-turbo model
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo') # Loading GPT-3.5-turbo model
 # llm_45_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-4-turbo')
 
 class LearningPlan():
@@ -43,28 +42,31 @@ class LearningPlan():
         course_plan_df.to_excel('output/course_learning_plan.xlsx', index=False)
         course_plan_df.to_csv('output/course_learning_plan.csv', index=False)
 
-    def build_learning_schedule(self, user_inputs_dict, course_inventory_df):
-        
+    def learning_architect(self):
+        return Agent(
+            role='Lead Learning Architect',
+            goal='Design a comprehensive and effective learning schedule that exceeds expectations.',
+            backstory='''As a Lead Learning Architect at a prominent online learning company, you possess in-depth knowledge of 
+                online courses, including their highlights, content, and syllabus. Your expertise lies in creating detailed and 
+                tailored learning schedules that align with students' individual learning plans and time availability. 
+                Your role involves leveraging this knowledge to craft learning experiences that optimize student engagement and success.''',
+            allow_delegation=False,
+            llm=llm_35_turbo
+        )
+
+    def build_learning_schedule(self, user_inputs_dict, course_inventory_df, parallel=True, max_workers=4):
+        '''
+        Generate one learning plan per selected course. In parallel mode the per-course plans are generated
+        concurrently (up to max_workers at a time) with a shared LLM client.
+        '''
         selected_course = course_inventory_df[course_inventory_df['Title'].isin(user_inputs_dict['selected_course_list'])]
-        
-        plan_df = pd.DataFrame(columns = selected_course.columns)
-
-        for i in range(len(selected_course)):
-            learning_plans = selected_course.iloc[i].to_dict()
-
-            agent = Agent(
-                role='Lead Learning Architect',
-                goal='Design a comprehensive and effective learning schedule that exceeds expectations.',
-                backstory='''As a Lead Learning Architect at a prominent online learning company, you possess in-depth knowledge of 
-                    online courses, including their highlights, content, and syllabus. Your expertise lies in creating detailed and 
-                    tailored learning schedules that align with students' individual learning plans and time availability. 
-                    Your role involves leveraging this knowledge to craft learning experiences that optimize student engagement and success.''',
-                allow_delegation=False,
-                llm=llm_35_turbo
-            )
 
+        # One agent per worker thread, all sharing the same LLM client
+        agent_pool = AgentPool(self.learning_architect)
+
+        def build_plan(course):
             task = Task(
-                agent=agent,
+                agent=agent_pool.get(),
                 description=dedent(f'''
                 Review the provided course syllabus below thoroughly. 
                 Customize a detailed online learning schedule to align with user's unique needs, learning schedule and preference.
@@ -72,7 +74,7 @@ class LearningPlan():
                 Please take into account the user's notes to design the learning schedule.
                 Consider any specific requirements or preferences mentioned by the user in the notes.
 
-                Course Content: {selected_course.iloc[i]}
+                Course Content: {course}
                 Learning Schedule: {user_inputs_dict['schedule']}
                 User Notes: {user_inputs_dict['notes']}
 
@@ -80,14 +82,19 @@ class LearningPlan():
                 '''),
                 expected_output=("Clear online course learning schedule in bullet points")
             )
+            return task.execute()
 
-            plan_results = task.execute()
-            learning_plans['Plan'] = plan_results
+        courses = [selected_course.iloc[i] for i in range(len(selected_course))]
+        plan_results = run_concurrently(build_plan, courses, max_workers=max_workers if parallel else 1)
 
-            df_temp = pd.DataFrame.from_dict(learning_plans, orient='index').T
-            plan_df = pd.concat([plan_df, df_temp])
+        # Collect all plans into a single DataFrame at the end
+        learning_plans = []
+        for course, plan in zip(courses, plan_results):
+            learning_plan = course.to_dict()
+            learning_plan['Plan'] = plan
+            learning_plans.append(learning_plan)
 
-        return plan_df
+        return pd.DataFrame(learning_plans, columns=list(selected_course.columns) + ['Plan'])
 
 
 # if __name__ == '__main__':
@@ -0,0 +1,129 @@
+'''
+Local exact-match LLM response cache shared by every crew and tool.
+
+Responses are stored in SQLite, keyed by model and call parameters (langchain's llm_string) plus a
+whitespace-normalized prompt hash, with a TTL and size-bounded LRU eviction. Registered as
+langchain's global cache, so repeated runs of the crews and tools with the same inputs cost no
+LLM calls. Clients that must sample a fresh answer every time (chat replies) are created with
+get_chat_llm(..., cache=False); wrap a call in bypass_llm_cache() to skip the cache for one block.
+'''
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain.globals import get_llm_cache, set_llm_cache
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+LLM_CACHE_PATH = os.getenv('JOBFUSION_LLM_CACHE_PATH', 'output/llm_cache.sqlite')
+LLM_CACHE_TTL = float(os.getenv('JOBFUSION_LLM_CACHE_TTL', 7 * 24 * 3600))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('JOBFUSION_LLM_CACHE_MAX_ENTRIES', 10000))
+
+_bypass = ContextVar('llm_cache_bypass', default=False)
+
+
+@contextmanager
+def bypass_llm_cache():
+    '''
+    Skip the cache (no lookup, no store) for the LLM calls made inside this block
+    '''
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def normalize_prompt(prompt):
+    '''
+    Collapse whitespace, including JSON-escaped newlines and tabs, so formatting-only differences hit the cache
+    '''
+    return re.sub(r'(?:\s|\\n|\\t|\\r)+', ' ', prompt).strip()
+
+
+def cache_key(prompt, llm_string):
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(llm_string.encode('utf-8')).digest())
+    digest.update(normalize_prompt(prompt).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    def __init__(self, database_path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.database_path = database_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if os.path.dirname(database_path):
+            os.makedirs(os.path.dirname(database_path), exist_ok=True)
+        self._connection = sqlite3.connect(database_path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS llm_cache ('
+                'key TEXT PRIMARY KEY, llm_string TEXT, response TEXT, created_at REAL, accessed_at REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)')
+
+    def lookup(self, prompt, llm_string):
+        if _bypass.get():
+            return None
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute('SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._connection.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                return None
+            self._connection.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return [loads(generation) for generation in json.loads(response)]
+
+    def update(self, prompt, llm_string, return_val):
+        if _bypass.get():
+            return
+        key = cache_key(prompt, llm_string)
+        response = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, llm_string, response, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, llm_string, response, now, now))
+            self._evict()
+
+    def _evict(self):
+        '''
+        Drop expired entries, then the least recently used ones beyond max_entries
+        '''
+        if self.ttl:
+            self._connection.execute('DELETE FROM llm_cache WHERE created_at < ?', (time.time() - self.ttl,))
+        (count,) = self._connection.execute('SELECT COUNT(*) FROM llm_cache').fetchone()
+        if self.max_entries and count > self.max_entries:
+            self._connection.execute(
+                'DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)',
+                (count - self.max_entries,))
+
+    def clear(self, **kwargs):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM llm_cache')
+
+
+def enable_llm_cache(database_path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+    '''
+    Register the SQLite cache as langchain's global LLM cache (idempotent); set JOBFUSION_LLM_CACHE=0 to disable
+    '''
+    if os.getenv('JOBFUSION_LLM_CACHE', '1') == '0':
+        return None
+    llm_cache = get_llm_cache()
+    if not isinstance(llm_cache, SQLiteLLMCache):
+        llm_cache = SQLiteLLMCache(database_path, ttl, max_entries)
+        set_llm_cache(llm_cache)
+    return llm_cache
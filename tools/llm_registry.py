@@ -0,0 +1,226 @@
+'''
+Process-wide registry of OpenAI clients.
+
+Every chat model and embeddings client is created here and shares one pooled httpx client, so
+the crews, the chatbot and the tools reuse connections instead of each opening their own. Requests
+go through a per-model token-bucket limiter with requests/minute and tokens/minute budgets shared by
+all threads; a 429 pauses every thread calling that model for the server's Retry-After. Failed calls
+are retried by the OpenAI SDK with jittered exponential backoff. Chat models also use the local LLM
+response cache, unless created with cache=False. Embedding requests made during a traced run are recorded as spans of its trace.
+
+Budgets can be set with JOBFUSION_OPENAI_RPM / JOBFUSION_OPENAI_TPM; JOBFUSION_OPENAI_MAX_RETRIES,
+JOBFUSION_OPENAI_MAX_CONNECTIONS and JOBFUSION_OPENAI_TIMEOUT tune the client. With
+JOBFUSION_EMBEDDINGS=local, embeddings come from a local CPU model instead (tools/local_embeddings.py).
+'''
+
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from tools.tracing import current_trace, estimate_cost, record_span
+
+DEFAULT_CHAT_MODEL = 'gpt-3.5-turbo'
+DEFAULT_EMBEDDING_MODEL = 'text-embedding-ada-002'
+EMBEDDINGS_BACKEND = os.getenv('JOBFUSION_EMBEDDINGS', 'openai')  # openai | local
+REQUESTS_PER_MINUTE = float(os.getenv('JOBFUSION_OPENAI_RPM', 3500))
+TOKENS_PER_MINUTE = float(os.getenv('JOBFUSION_OPENAI_TPM', 90000))
+MAX_RETRIES = int(os.getenv('JOBFUSION_OPENAI_MAX_RETRIES', 6))
+MAX_CONNECTIONS = int(os.getenv('JOBFUSION_OPENAI_MAX_CONNECTIONS', 64))
+REQUEST_TIMEOUT = float(os.getenv('JOBFUSION_OPENAI_TIMEOUT', 120))  # seconds
+DEFAULT_COMPLETION_TOKENS = 512  # reserved per chat request without max_tokens, as the provider does
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket():
+    '''
+    Holds up to `per_minute` units, refilled continuously at per_minute / 60 units a second
+    '''
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated_at = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+class RateLimiter():
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        '''
+        Block until one request and `tokens` tokens fit in the budgets, then take them
+        '''
+        tokens = min(tokens, self.tokens.capacity)  # an oversized request must still go through eventually
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                wait = max(self.paused_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    self.requests.level -= 1
+                    self.tokens.level -= tokens
+                    return
+            time.sleep(min(wait, 5.0))
+
+    def pause(self, seconds):
+        '''
+        Hold back every caller for `seconds`, e.g. after the provider answered 429
+        '''
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def rate_limiter(model):
+    '''
+    The limiter shared by every thread calling this model
+    '''
+    with _rate_limiters_lock:
+        if model not in _rate_limiters:
+            _rate_limiters[model] = RateLimiter()
+        return _rate_limiters[model]
+
+
+def estimate_tokens(body):
+    '''
+    Tokens a request counts against the budget: prompt text (~4 chars a token) plus the completion reserve
+    '''
+    if 'messages' in body:
+        prompt_chars = sum(len(json.dumps(message.get('content', ''))) for message in body['messages'])
+        return prompt_chars // CHARS_PER_TOKEN + (body.get('max_tokens') or DEFAULT_COMPLETION_TOKENS)
+    texts = body.get('input') or body.get('prompt') or ''
+    if isinstance(texts, str):
+        texts = [texts]
+    return sum(len(text) if isinstance(text, str) else len(text or []) * CHARS_PER_TOKEN for text in texts) // CHARS_PER_TOKEN
+
+
+def request_body(request):
+    try:
+        return json.loads(request.content or b'{}')
+    except (ValueError, TypeError):
+        return {}
+
+
+def before_request(request):
+    '''
+    httpx request hook: wait for the model's rate budget before every attempt, including SDK retries
+    '''
+    request.extensions['jobfusion_started_ns'] = time.time_ns()
+    body = request_body(request)
+    if body.get('model'):
+        rate_limiter(body['model']).acquire(estimate_tokens(body))
+
+
+def after_response(response):
+    '''
+    httpx response hook: on 429, pause all callers of that model for the Retry-After the server asked for
+    '''
+    trace_embedding_call(response)
+    if response.status_code != 429:
+        return
+    body = request_body(response.request)
+    try:
+        retry_after = float(response.headers.get('retry-after', 1))
+    except ValueError:
+        retry_after = 1.0
+    if body.get('model'):
+        print(f"Rate limited on {body['model']}, pausing for {retry_after:.1f}s")
+        rate_limiter(body['model']).pause(retry_after)
+
+
+def trace_embedding_call(response):
+    '''
+    Record an embedding request, including its rate-limit wait, in the current trace; chat calls are traced by LangChain callbacks
+    '''
+    if current_trace() is None or not response.request.url.path.endswith('/embeddings'):
+        return
+    body = request_body(response.request)
+    model = body.get('model', DEFAULT_EMBEDDING_MODEL)
+    inputs = body.get('input') or []
+    usage = {}
+    if response.status_code == 200:
+        response.read()
+        usage = json.loads(response.content).get('usage') or {}
+    tokens = usage.get('prompt_tokens', estimate_tokens(body))
+    record_span(model, 'embedding', response.request.extensions.get('jobfusion_started_ns'),
+                error=None if response.status_code == 200 else f'HTTP {response.status_code}',
+                model=model, inputs=len(inputs) if isinstance(inputs, list) else 1, prompt_tokens=tokens,
+                cost_usd=estimate_cost(model, tokens))
+
+
+@lru_cache(maxsize=1)
+def http_client():
+    '''
+    One pooled HTTP client for all OpenAI calls in the process
+    '''
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS // 2),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0),
+        event_hooks={'request': [before_request], 'response': [after_response]})
+
+
+def openai_api_key():
+    '''
+    The API key from the environment, or from Streamlit secrets when deployed on Streamlit
+    '''
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        import streamlit as st
+        api_key = st.secrets['OPENAI_API_KEY']
+    return api_key
+
+
+def new_chat_llm(model, temperature, cache=None, **kwargs):
+    from langchain_openai import ChatOpenAI
+    from tools.llm_cache import enable_llm_cache
+    enable_llm_cache()  # serve repeated prompts from the local LLM response cache
+    # cache=None uses the global cache, whose key includes the temperature; cache=False always calls the model
+    return ChatOpenAI(api_key=openai_api_key(), model=model, temperature=temperature, cache=cache,
+                      max_retries=MAX_RETRIES, http_client=http_client(), **kwargs)
+
+
+@lru_cache(maxsize=None)
+def shared_chat_llm(model, temperature, streaming, cache):
+    return new_chat_llm(model, temperature, cache, streaming=streaming)
+
+
+def get_chat_llm(model=DEFAULT_CHAT_MODEL, temperature=0.7, streaming=False, callbacks=None, cache=None):
+    '''
+    The shared chat model for these settings; a client with its own callbacks (e.g. a per-session
+    stream handler) is created fresh but still uses the shared connection pool and rate limiter.
+    Pass cache=False for calls that must sample a fresh answer every time, like chat replies
+    '''
+    if callbacks:
+        return new_chat_llm(model, temperature, cache, streaming=streaming, callbacks=callbacks)
+    return shared_chat_llm(model, temperature, streaming, cache)
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(model=None, backend=EMBEDDINGS_BACKEND):
+    '''
+    The shared embeddings client used for indexing and queries: OpenAI, or the local CPU model for backend='local'
+    '''
+    if backend == 'local':
+        from tools.local_embeddings import LOCAL_EMBEDDING_MODEL, LocalEmbeddings
+        return LocalEmbeddings(model or LOCAL_EMBEDDING_MODEL)
+    if backend != 'openai':
+        raise ValueError(f"Unknown embeddings backend {backend!r}, expected 'openai' or 'local'")
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(openai_api_key=openai_api_key(), model=model or DEFAULT_EMBEDDING_MODEL,
+                            max_retries=MAX_RETRIES, http_client=http_client())
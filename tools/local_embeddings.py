@@ -0,0 +1,116 @@
+'''
+Local CPU embedding backend.
+
+Runs a sentence_transformers model on CPU as a drop-in replacement for OpenAIEmbeddings, so
+indexing and query-time retrieval make no network round-trips and re-indexing no longer depends on
+API throughput. Texts are embedded in batches and the vectors are L2-normalized. The model can run
+as-is (torch), dynamically int8-quantized (quantized) or through ONNX Runtime (onnx, needs
+optimum[onnxruntime]). Inference uses at most JOBFUSION_EMBEDDING_THREADS CPU threads, and calls
+from concurrent crew tasks take turns so the cap holds.
+
+Selected with JOBFUSION_EMBEDDINGS=local, see tools/llm_registry.get_embeddings. The model name
+includes the runtime, so the embedding cache and the vector indexes never mix vectors of different
+models or runtimes.
+'''
+
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import List
+from langchain_core.embeddings import Embeddings
+from tools.tracing import record_span
+
+LOCAL_EMBEDDING_MODEL = os.getenv('JOBFUSION_LOCAL_EMBEDDING_MODEL', 'BAAI/bge-small-en-v1.5')
+EMBEDDING_RUNTIME = os.getenv('JOBFUSION_EMBEDDING_RUNTIME', 'torch')  # torch | quantized | onnx
+EMBEDDING_BATCH_SIZE = int(os.getenv('JOBFUSION_EMBEDDING_BATCH_SIZE', 32))
+EMBEDDING_THREADS = int(os.getenv('JOBFUSION_EMBEDDING_THREADS', min(4, os.cpu_count() or 1)))
+RUNTIMES = ('torch', 'quantized', 'onnx')
+
+
+class OnnxEncoder():
+    '''
+    The transformer of a sentence_transformers model exported to ONNX Runtime, with the model's own pooling
+    '''
+    def __init__(self, sentence_transformer, model_name, threads):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True, session_options=session_options)
+        self.tokenizer = sentence_transformer.tokenizer
+        self.max_length = sentence_transformer.max_seq_length
+        pooling = sentence_transformer[1]
+        self.cls_pooling = pooling.pooling_mode_cls_token
+
+    def encode(self, texts, batch_size):
+        import numpy as np
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_length, return_tensors='np')
+            hidden = self.model(**tokens).last_hidden_state
+            if self.cls_pooling:
+                pooled = hidden[:, 0]
+            else:
+                mask = tokens['attention_mask'][..., None].astype(hidden.dtype)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            vectors.append(pooled)
+        vectors = np.concatenate(vectors)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+@lru_cache(maxsize=4)
+def load_encoder(model_name, runtime, threads):
+    '''
+    Load a model once per process for the given runtime
+    '''
+    if runtime not in RUNTIMES:
+        raise ValueError(f'Unknown embedding runtime {runtime!r}, expected one of {RUNTIMES}')
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, device='cpu')
+    model.eval()
+    if runtime == 'quantized':
+        # int8 weights for the Linear layers, activations quantized on the fly
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if runtime == 'onnx':
+        return OnnxEncoder(model, model_name, threads)
+    return model
+
+
+class LocalEmbeddings(Embeddings):
+    def __init__(self, model_name=LOCAL_EMBEDDING_MODEL, runtime=EMBEDDING_RUNTIME, batch_size=EMBEDDING_BATCH_SIZE,
+                 threads=EMBEDDING_THREADS, query_instruction=''):
+        self.model_name = model_name
+        self.runtime = runtime
+        self.batch_size = batch_size
+        self.threads = threads
+        self.query_instruction = query_instruction
+        self.model = model_name if runtime == 'torch' else f'{model_name}@{runtime}'
+        self._lock = threading.Lock()
+
+    def encode(self, texts):
+        '''
+        Batched, normalized embeddings of the texts as lists of floats
+        '''
+        if not texts:
+            return []
+        started_ns = time.time_ns()
+        encoder = load_encoder(self.model_name, self.runtime, self.threads)
+        with self._lock:
+            if isinstance(encoder, OnnxEncoder):
+                vectors = encoder.encode(texts, self.batch_size)
+            else:
+                vectors = encoder.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                         convert_to_numpy=True, show_progress_bar=False)
+        record_span(self.model, 'embedding', started_ns, model=self.model, inputs=len(texts))
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([self.query_instruction + text])[0]
@@ -0,0 +1,50 @@
+'''
+Local reranking compressor for retrievers.
+
+Scores (query, chunk) pairs with a small sentence_transformers cross-encoder on CPU and keeps the
+top_n chunks, replacing the per-chunk LLM calls of LLMChainExtractor with no network round-trips.
+'''
+
+from functools import lru_cache
+from typing import Optional, Sequence
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+DEFAULT_RERANK_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+
+@lru_cache(maxsize=4)
+def load_cross_encoder(model_name, max_length=512):
+    '''
+    Load a cross-encoder once per process
+    '''
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, max_length=max_length, device='cpu')
+
+
+class CrossEncoderReranker(BaseDocumentCompressor):
+    model_name: str = DEFAULT_RERANK_MODEL
+    top_n: int = 3
+    score_threshold: Optional[float] = None
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        '''
+        Rerank the retrieved chunks by cross-encoder relevance and keep the top_n
+        '''
+        if not documents:
+            return []
+        scores = load_cross_encoder(self.model_name).predict([(query, doc.page_content) for doc in documents])
+        ranked = sorted(zip(documents, scores), key=lambda pair: pair[1], reverse=True)
+
+        reranked = []
+        for doc, score in ranked[:self.top_n]:
+            if self.score_threshold is not None and score < self.score_threshold:
+                break
+            reranked.append(Document(page_content=doc.page_content, metadata={**doc.metadata, 'relevance_score': float(score)}))
+        return reranked
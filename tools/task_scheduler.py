@@ -0,0 +1,109 @@
+'''
+Dependency-aware execution of crewai tasks.
+
+A task's `context` lists the tasks it depends on. Every task whose dependencies have finished is
+started on a thread pool, so independent tasks run concurrently, and Task.execute hands each task
+the outputs of its context tasks. Each task runs as a span of the caller's trace, if any.
+
+kickoff_task_graph does the agent and task setup of Crew.kickoff (i18n, function_calling_llm, step and
+task callbacks, agent executors, delegation tools) and sets crew.usage_metrics. It does not interpolate
+kickoff inputs, stop a max_rpm counter or send crewai's telemetry; the run's trace covers the latter.
+'''
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from tools.tracing import run_with_context, span
+
+
+def task_dependencies(tasks):
+    '''
+    For each task, the positions of the tasks listed in its context
+    '''
+    positions = {id(task): i for i, task in enumerate(tasks)}
+    dependencies = []
+    for task in tasks:
+        upstream = set()
+        for context_task in task.context or []:
+            if id(context_task) not in positions:
+                raise ValueError(f'Task context refers to a task that is not scheduled: {context_task.description.strip()[:80]}')
+            upstream.add(positions[id(context_task)])
+        dependencies.append(upstream)
+    return dependencies
+
+
+def execute_task(task, position, total):
+    with span(task.agent.role, 'task', position=f'{position + 1}/{total}', description=task.description.strip()[:200]):
+        return task.execute()
+
+
+def run_task_graph(tasks, max_workers=4):
+    '''
+    Run the tasks in dependency order, independent ones concurrently.
+    Tasks sharing an agent never run at the same time, since an Agent can only run one task at once.
+    Returns the task outputs in task order; if a task fails, the running tasks finish and the error is raised.
+    '''
+    dependencies = task_dependencies(tasks)
+    outputs = [None] * len(tasks)
+    done = set()
+    running = {}
+    busy_agents = set()
+    error = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while len(done) < len(tasks):
+            if error is None:
+                for i, task in enumerate(tasks):
+                    ready = i not in done and i not in running.values() and dependencies[i] <= done
+                    if ready and id(task.agent) not in busy_agents:
+                        print(f'Starting task {i + 1}/{len(tasks)}: {task.agent.role}')
+                        busy_agents.add(id(task.agent))
+                        running[pool.submit(run_with_context(execute_task, task, i, len(tasks)))] = i
+            if not running:
+                if error is not None:
+                    raise error
+                raise ValueError('Task dependencies contain a cycle')
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = running.pop(future)
+                busy_agents.discard(id(tasks[i].agent))
+                try:
+                    outputs[i] = future.result()
+                    done.add(i)
+                    print(f'Finished task {i + 1}/{len(tasks)}: {tasks[i].agent.role}')
+                except Exception as e:
+                    print(f'Task {i + 1}/{len(tasks)} failed: {e}')
+                    error = error or e
+    return outputs
+
+
+def kickoff_task_graph(crew, max_workers=4):
+    '''
+    Stand-in for crew.kickoff() on a sequential crew that runs the tasks with run_task_graph; returns the last task's output
+    '''
+    from crewai.tools.agent_tools import AgentTools
+    from crewai.utilities import I18N
+
+    i18n = I18N(language=crew.language, language_file=crew.language_file)
+    for agent in crew.agents:
+        agent.i18n = i18n
+        agent.crew = crew
+        if not agent.function_calling_llm:
+            agent.function_calling_llm = crew.function_calling_llm
+        if not agent.step_callback:
+            agent.step_callback = crew.step_callback
+        agent.create_agent_executor()
+
+    for task in crew.tasks:
+        if crew.task_callback and not task.callback:
+            task.callback = crew.task_callback
+        # Delegation tools, as the sequential process adds them
+        if task.agent.allow_delegation:
+            agents_for_delegation = [agent for agent in crew.agents if agent != task.agent]
+            if agents_for_delegation:
+                task.tools += AgentTools(agents=agents_for_delegation).tools()
+
+    outputs = run_task_graph(crew.tasks, max_workers)
+
+    metrics = [agent._token_process.get_summary() for agent in crew.agents]
+    crew.usage_metrics = {key: sum(m[key] for m in metrics) for key in metrics[0]} if metrics else {}
+    return outputs[-1]
@@ -10,23 +10,30 @@ import pandas as pd
 from datetime import datetime
 from crewai import Agent, Task
 from langchain.tools import tool
-from langchain_openai import ChatOpenAI
+from tools.llm_registry import get_chat_llm
 from dotenv import load_dotenv
 import os
 from crewai_tools import BaseTool
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tools.http_fetcher import fetcher
+from tools.concurrency import AgentPool, OrderedWriter, run_concurrently
+from typing import Optional
 
 # Load the .env file
 load_dotenv()
 # Get the OPENAI_API_KEY
 openai_api_key = os.getenv('OPENAI_API_KEY')
 # Create the llm
-llm_35_turbo = ChatOpenAI(api_key=openai_api_key, model='gpt-3.5-turbo') # Loading GPT-3.5-turbo model
+llm_35_turbo = get_chat_llm('gpt-3.5-turbo') # Loading GPT-3.5-turbo model
 
 
 class TopVoiceScraperCuratorTools(BaseTool):
     name: str = 'deeplearning.ai top voice scraping and summarization tool'
     description: str = ('A tool to scrape and summarize the articles authored by leading voices from AI top voice source - deeplearning.ai.\
                         extracting key findings and trends related to AI development and its industrial applications. ')
+    max_workers: int = 16  # concurrent page fetches; per-host limits are enforced by the shared fetcher
+    summary_concurrency: int = 4  # concurrent LLM summaries
+    max_articles: Optional[int] = 20  # newest articles summarized, one LLM call each; None summarizes every article
 
     def generate_webpage_url_list(self, webpage_url):
         '''
@@ -43,7 +50,7 @@ class TopVoiceScraperCuratorTools(BaseTool):
         get article's URL from the webpage
         '''
         # Send a GET request to the page
-        response = requests.get(webpage_url)
+        response = fetcher.get(webpage_url)
 
         # Parse the page content
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -71,7 +78,7 @@ class TopVoiceScraperCuratorTools(BaseTool):
         Get the article content from its URL
         '''
         # Send a GET request to the page
-        response = requests.get(article_url)
+        response = fetcher.get(article_url)
 
         # Parse the page content
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -81,12 +88,62 @@ class TopVoiceScraperCuratorTools(BaseTool):
 
         # Find the article content
         article_content_div = soup.find(has_prose_in_class)
+        if article_content_div is None:
+            return ''
 
         # Extract the text from the div
         article_body = article_content_div.get_text()
 
         return article_body
-    
+
+    def crawl_articles(self, webpage_url_list):
+        '''
+        Crawl listing pages and their articles concurrently. Article fetches start as soon as their
+        listing page is parsed, so discovery and article fetching overlap.
+        '''
+        listings = []
+        article_futures = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            listing_futures = {pool.submit(self.generate_article_urls, url): page_index
+                               for page_index, url in enumerate(webpage_url_list)}
+
+            for future in as_completed(listing_futures):
+                page_index = listing_futures[future]
+                try:
+                    articles_urls_dict = future.result()
+                except Exception as e:
+                    print(f'Failed to fetch listing page {webpage_url_list[page_index]}: {e}')
+                    continue
+                for position, (title, article_url) in enumerate(zip(articles_urls_dict['title'], articles_urls_dict['url'])):
+                    listings.append((page_index, position, title, article_url))
+                    # Articles listed on several pages are only fetched once
+                    if article_url not in article_futures:
+                        article_futures[article_url] = pool.submit(self.generate_article_content, article_url)
+
+            contents = {}
+            for article_url, future in article_futures.items():
+                try:
+                    contents[article_url] = future.result()
+                except Exception as e:
+                    print(f'Failed to fetch article {article_url}: {e}')
+
+        # Keep the listing order regardless of completion order
+        rows = []
+        for _, _, title, article_url in sorted(listings, key=lambda row: (row[0], row[1])):
+            if article_url in contents:
+                rows.append((title, article_url, contents.pop(article_url)))
+        return pd.DataFrame(rows, columns=['title', 'url', 'content'])
+
+    def researcher(self):
+        return Agent(
+            role='Principal Researcher',
+            goal='Do amazing research and summaries based on the content you are working with',
+            backstory="You're a Principal Researcher at a big company and your job is to summarize the trends and advancements in AI development and industrial application from articles authored by AI top voices. \
+            List out the most important trends or insights from them.",
+            allow_delegation=False,
+            llm=llm_35_turbo
+        )
+
     # @tool('deeplearning.ai top voice scraping and summarization')
     def _run(self, top_voice_source: str) -> str:
         '''
@@ -101,56 +158,30 @@ class TopVoiceScraperCuratorTools(BaseTool):
 
         webpage_url_list = self.generate_webpage_url_list(webpage_url=webpage)
 
-        df_list = []
-
-        for webpage_url in webpage_url_list:
-            articles_urls_dict = self.generate_article_urls(webpage_url)
-
-            article_content_list = []
-            for article_url in articles_urls_dict['url']:
-                article_content = self.generate_article_content(article_url)
-                article_content_list.append(article_content)
-            
-            articles_urls_dict['content'] = article_content_list
-
-            # Convert the dictionary to a dataframe and append it to the list
-            df = pd.DataFrame(articles_urls_dict)
-            df_list.append(df)
-        
-        # Concatenate all the dataframes in the list
-        final_df = pd.concat(df_list, ignore_index=True)
+        final_df = self.crawl_articles(webpage_url_list)
         dt_today = datetime.now().strftime("%Y%m%d")
         final_df.to_excel('output/deeplearning_ai_articles.xlsx', index=False, sheet_name=dt_today)
         print("Total number of articles extracted : ", final_df.shape[0])
 
-        important_findings = []
-        for chunk in final_df['content'].head(5):
-            
-            agent = Agent(
-                role='Principal Researcher',
-                goal='Do amazing research and summaries based on the content you are working with',
-                backstory="You're a Principal Researcher at a big company and your job is to summarize the trends and advancements in AI development and industrial application from articles authored by AI top voices. \
-                List out the most important trends or insights from them.",
-                allow_delegation=False,
-                llm=llm_35_turbo
-            )
+        contents = final_df['content'] if self.max_articles is None else final_df['content'].head(self.max_articles)
+        contents = [chunk for chunk in contents if chunk]
 
+        # One researcher agent per worker thread, all sharing the same LLM client
+        agent_pool = AgentPool(self.researcher)
+
+        def summarize(chunk):
             task = Task(
-                agent=agent,
+                agent=agent_pool.get(),
                 description=f'Distill the content below into elegantly presented and digestible insights, \
                 Return the most significant trends and advancements in AI development and industrial application.\n\nCONTENT\n----------\n{chunk}',
                 expected_output=("Full analysis report in bullet points"),
             )
+            return task.execute()
 
-            findings = task.execute()
-            important_findings.append(findings)
-
-        # print(important_findings)
-
-        # Save the output to a .txt file
+        # Save the output to a .txt file in article order as the summaries arrive
         with open('output/important_findings_AI_top_voice.txt', 'w') as f:
-            for finding in important_findings:
-                f.write(finding + '\n')
+            important_findings = run_concurrently(summarize, contents, max_workers=self.summary_concurrency, on_result=OrderedWriter(f))
+        important_findings = [finding for finding in important_findings if finding is not None]
 
         return "\n\n".join(important_findings)
 
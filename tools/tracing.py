@@ -0,0 +1,252 @@
+'''
+Tracing of crew runs and chat turns.
+
+A run opened with trace_run() records a span for the crew kickoff, every task, agent loop and loop
+iteration, and every LLM, tool, retriever and embedding call made while it runs, including calls on
+the worker threads of run_task_graph. Each finished span is appended as one JSON line to
+<trace_dir>/<started>_<name>_<id>.jsonl, using OpenTelemetry's span field names (traceId, spanId,
+parentSpanId, startTimeUnixNano, ...). LLM and embedding spans carry prompt/completion tokens and an
+estimated cost in USD.
+
+This module only needs the standard library, so the Streamlit app can read traces without loading
+LangChain; the callback handler lives in tools/tracing_callbacks.py. Set JOBFUSION_TRACING=0 to turn
+tracing off.
+'''
+
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+TRACING_ENABLED = os.getenv('JOBFUSION_TRACING', '1') != '0'
+TRACE_DIR = 'output/traces'
+
+# USD per 1K (prompt, completion) tokens; the longest model-name prefix that matches wins
+MODEL_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-4o': (0.005, 0.015),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4': (0.03, 0.06),
+    'text-embedding-ada-002': (0.0001, 0.0),
+    'text-embedding-3-small': (0.00002, 0.0),
+    'text-embedding-3-large': (0.00013, 0.0),
+}
+
+_current_trace = contextvars.ContextVar('jobfusion_trace', default=None)
+_current_span = contextvars.ContextVar('jobfusion_span', default=None)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens=0):
+    '''
+    Estimated USD cost of a call, or None for a model without a known price
+    '''
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if (model or '').startswith(prefix):
+            prompt_price, completion_price = MODEL_PRICES[prefix]
+            return round((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000, 6)
+    return None
+
+
+class Span():
+    def __init__(self, trace, name, kind, parent_id=None, attributes=None, start_ns=None):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = start_ns or time.time_ns()
+        self.ended = False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error=None):
+        if self.ended:
+            return
+        self.ended = True
+        self.trace.write(self, time.time_ns(), error)
+
+
+class Trace():
+    def __init__(self, name, trace_dir=TRACE_DIR):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        os.makedirs(trace_dir, exist_ok=True)
+        self.path = os.path.join(trace_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{self.trace_id[:8]}.jsonl")
+        self.handler = None  # LangChain callback handler recording this trace's LLM and agent spans
+        self._lock = threading.Lock()
+
+    def start_span(self, name, kind, parent_id=None, attributes=None, start_ns=None):
+        return Span(self, name, kind, parent_id, attributes, start_ns)
+
+    def write(self, span, end_ns, error=None):
+        record = {
+            'traceId': self.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': span.parent_id,
+            'name': span.name,
+            'kind': span.kind,
+            'startTimeUnixNano': span.start_ns,
+            'endTimeUnixNano': end_ns,
+            'durationMs': round((end_ns - span.start_ns) / 1e6, 1),
+            'status': 'error' if error is not None else 'ok',
+            'attributes': dict(span.attributes, **({'error': str(error)[:500]} if error is not None else {})),
+        }
+        line = json.dumps(record, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_parent_id():
+    '''
+    The span new work nests under: the tool or retriever call running on this thread, else the innermost open span
+    '''
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    active_span = trace.handler.active_span() if trace.handler is not None else None
+    if active_span is not None:
+        return active_span.span_id
+    span = _current_span.get()
+    return span.span_id if span is not None else None
+
+
+@contextmanager
+def span(name, kind='internal', **attributes):
+    '''
+    Record the enclosed block as a span of the current trace; does nothing outside a traced run
+    '''
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    current = trace.start_span(name, kind, current_parent_id(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    else:
+        current.end()
+    finally:
+        _current_span.reset(token)
+
+
+def record_span(name, kind, start_ns, error=None, **attributes):
+    '''
+    Record an already finished call, e.g. an HTTP request timed by its hooks
+    '''
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.start_span(name, kind, current_parent_id(), attributes, start_ns).end(error)
+
+
+@contextmanager
+def trace_run(name, trace_dir=TRACE_DIR, **attributes):
+    '''
+    Trace everything the enclosed block runs into a new trace file; nested runs become spans of the outer trace
+    '''
+    if not TRACING_ENABLED or _current_trace.get() is not None:
+        with span(name, 'crew', **attributes) as current:
+            yield current
+        return
+
+    from tools.tracing_callbacks import start_tracing_handler, stop_tracing_handler
+    trace = Trace(name, trace_dir)
+    trace_token = _current_trace.set(trace)
+    handler_token = start_tracing_handler(trace)
+    try:
+        with span(name, 'crew', **attributes) as current:
+            yield current
+    finally:
+        stop_tracing_handler(handler_token)
+        _current_trace.reset(trace_token)
+        print(f'Trace written to {trace.path}')
+
+
+def run_with_context(fn, *args):
+    '''
+    fn(*args) bound to a copy of the caller's context, so work submitted to a thread pool stays in the caller's trace
+    '''
+    context = contextvars.copy_context()
+    return lambda: context.run(fn, *args)
+
+
+def load_trace(path):
+    spans = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue  # a line still being written
+    return spans
+
+
+def latest_trace(trace_dir=TRACE_DIR):
+    paths = glob.glob(os.path.join(trace_dir, '*.jsonl'))
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def summarize_trace(path, slowest=8):
+    '''
+    Timing breakdown of a trace: totals, per task (agent), per span kind, and the slowest calls and agent iterations
+    '''
+    spans = load_trace(path)
+    if not spans:
+        return None
+    by_id = {s['spanId']: s for s in spans}
+    root = next((s for s in spans if s['kind'] == 'crew' and s['parentSpanId'] is None), None)
+
+    def owning_task(s):
+        while s is not None and s['kind'] != 'task':
+            s = by_id.get(s['parentSpanId'])
+        return s
+
+    tasks = {s['spanId']: {'task': s['name'], 'seconds': s['durationMs'] / 1000, 'llm calls': 0, 'tokens': 0, 'cost $': 0.0}
+             for s in spans if s['kind'] == 'task'}
+    kinds = defaultdict(lambda: {'calls': 0, 'seconds': 0.0, 'tokens': 0, 'cost $': 0.0})
+    for s in spans:
+        tokens = s['attributes'].get('prompt_tokens', 0) + s['attributes'].get('completion_tokens', 0)
+        cost = s['attributes'].get('cost_usd') or 0.0
+        if s['kind'] in ('llm', 'tool', 'retriever', 'embedding'):
+            kind = kinds[s['kind']]
+            kind['calls'] += 1
+            kind['seconds'] += s['durationMs'] / 1000
+            kind['tokens'] += tokens
+            kind['cost $'] += cost
+        task = owning_task(s)
+        if task is not None and s['kind'] in ('llm', 'embedding'):
+            tasks[task['spanId']]['llm calls'] += s['kind'] == 'llm'
+            tasks[task['spanId']]['tokens'] += tokens
+            tasks[task['spanId']]['cost $'] += cost
+
+    slowest_spans = sorted((s for s in spans if s['kind'] in ('llm', 'tool', 'embedding', 'agent_iteration')),
+                           key=lambda s: s['durationMs'], reverse=True)[:slowest]
+    return {
+        'name': root['name'] if root else '_'.join(os.path.basename(path).split('_')[1:-1]),
+        'finished': root is not None,
+        'status': root['status'] if root else 'running',
+        'seconds': (max(s['endTimeUnixNano'] for s in spans) - min(s['startTimeUnixNano'] for s in spans)) / 1e9,
+        'llm_calls': kinds['llm']['calls'] if 'llm' in kinds else 0,
+        'tokens': sum(kind['tokens'] for kind in kinds.values()),
+        'cost_usd': sum(kind['cost $'] for kind in kinds.values()),
+        'by_task': [dict(task, **{'cost $': round(task['cost $'], 4)}) for task in tasks.values()],
+        'by_kind': [{'kind': name, **kind, 'seconds': round(kind['seconds'], 1), 'cost $': round(kind['cost $'], 4)}
+                    for name, kind in kinds.items()],
+        'slowest': [{'span': s['name'], 'kind': s['kind'], 'seconds': s['durationMs'] / 1000,
+                     'task': (owning_task(s) or {}).get('name', '')} for s in slowest_spans],
+    }
@@ -0,0 +1,198 @@
+'''
+LangChain callback handler that records the LLM, tool, retriever and agent spans of a traced run.
+
+The handler is attached through a LangChain configure hook, so every chain, chat model and
+retriever invoked while a trace is active reports to it without passing callbacks around.
+crewai calls tools directly rather than through LangChain, so an agent's tool calls and loop
+iterations are rebuilt from its executor run: each direct child run of the executor plans one
+iteration, and the tool call chosen by on_agent_action lasts until the next iteration starts.
+'''
+
+import threading
+from collections import defaultdict
+from contextvars import ContextVar
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from tools.llm_registry import CHARS_PER_TOKEN
+from tools.tracing import current_parent_id, estimate_cost
+
+_tracing_handler = ContextVar('jobfusion_tracing_handler', default=None)
+register_configure_hook(_tracing_handler, inheritable=True)
+
+
+def start_tracing_handler(trace):
+    trace.handler = TracingCallbackHandler(trace)
+    return _tracing_handler.set(trace.handler)
+
+
+def stop_tracing_handler(token):
+    _tracing_handler.reset(token)
+
+
+class AgentLoop():
+    '''
+    Spans of one agent executor run: the loop, its current iteration, and the tool called in that iteration
+    '''
+    def __init__(self, span):
+        self.span = span
+        self.iteration = None
+        self.iterations = 0
+        self.tool = None
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    def __init__(self, trace):
+        self.trace = trace
+        self._lock = threading.RLock()
+        self._spans = {}  # run_id -> open LLM, tool or retriever span
+        self._parents = {}  # run_id of an untraced chain -> span id its child runs nest under
+        self._loops = {}  # run_id of an agent executor -> AgentLoop
+        self._active = defaultdict(list)  # thread id -> open tool and retriever spans, innermost last
+
+    def active_span(self):
+        '''
+        The tool or retriever call running on this thread, which embedding calls and delegated agents nest under
+        '''
+        with self._lock:
+            stack = self._active.get(threading.get_ident())
+            return stack[-1] if stack else None
+
+    def end_active(self, span, error=None):
+        for stack in self._active.values():
+            if span in stack:
+                stack.remove(span)
+        span.end(error)
+
+    def parent_span_id(self, parent_run_id):
+        if parent_run_id in self._loops:
+            return self.next_iteration(self._loops[parent_run_id]).span_id
+        if parent_run_id in self._spans:
+            return self._spans[parent_run_id].span_id
+        if parent_run_id in self._parents:
+            return self._parents[parent_run_id]
+        return current_parent_id()
+
+    def next_iteration(self, loop):
+        self.end_iteration(loop)
+        loop.iterations += 1
+        loop.iteration = self.trace.start_span(f'iteration {loop.iterations}', 'agent_iteration', loop.span.span_id,
+                                               {'iteration': loop.iterations})
+        return loop.iteration
+
+    def end_iteration(self, loop, error=None):
+        if loop.tool is not None:
+            self.end_active(loop.tool, error)
+            loop.tool = None
+        if loop.iteration is not None:
+            loop.iteration.end(error)
+            loop.iteration = None
+
+    def start_span(self, name, kind, run_id, parent_run_id, attributes=None, active=False):
+        with self._lock:
+            span = self.trace.start_span(name, kind, self.parent_span_id(parent_run_id), attributes)
+            self._spans[run_id] = span
+            if active:
+                self._active[threading.get_ident()].append(span)
+        return span
+
+    def end_span(self, run_id, error=None):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+            if span is not None:
+                self.end_active(span, error)
+
+    # Chains: crewai's agent executor becomes an agent span with one span per iteration; other chains only pass their parent on
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get('name') or ((serialized or {}).get('id') or [''])[-1]
+        with self._lock:
+            parent_id = self.parent_span_id(parent_run_id)
+            if 'AgentExecutor' in name:
+                task = inputs.get('input', '') if isinstance(inputs, dict) else ''
+                self._loops[run_id] = AgentLoop(self.trace.start_span('agent', 'agent', parent_id, {'task': str(task).strip()[:200]}))
+            else:
+                self._parents[run_id] = parent_id
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self.end_chain(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.end_chain(run_id, error)
+
+    def end_chain(self, run_id, error=None):
+        with self._lock:
+            self._parents.pop(run_id, None)
+            loop = self._loops.pop(run_id, None)
+            if loop is not None:
+                self.end_iteration(loop, error)
+                loop.span.set(iterations=loop.iterations)
+                loop.span.end(error)
+
+    def on_agent_action(self, action, *, run_id, **kwargs):
+        with self._lock:
+            loop = self._loops.get(run_id)
+            if loop is None:
+                return
+            if loop.tool is not None:
+                self.end_active(loop.tool)
+            loop.tool = self.trace.start_span(action.tool, 'tool', (loop.iteration or loop.span).span_id,
+                                              {'tool_input': str(action.tool_input)[:500]})
+            self._active[threading.get_ident()].append(loop.tool)
+
+    # LLM calls
+    def start_llm(self, prompt_chars, run_id, parent_run_id, kwargs):
+        params = kwargs.get('invocation_params') or {}
+        model = params.get('model_name') or params.get('model') or ''
+        self.start_span(model or 'llm', 'llm', run_id, parent_run_id, {'model': model, 'prompt_chars': prompt_chars})
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self.start_llm(sum(len(str(message.content)) for batch in messages for message in batch), run_id, parent_run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self.start_llm(sum(len(prompt) for prompt in prompts), run_id, parent_run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        llm_output = response.llm_output or {}
+        usage = llm_output.get('token_usage') or {}
+        model = llm_output.get('model_name') or span.attributes['model']
+        if usage:
+            prompt_tokens, completion_tokens = usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)
+        else:
+            # Streamed and cached responses carry no usage, so estimate it from the text
+            completion_chars = sum(len(generation.text) for generations in response.generations for generation in generations)
+            prompt_tokens, completion_tokens = span.attributes['prompt_chars'] // CHARS_PER_TOKEN, completion_chars // CHARS_PER_TOKEN
+            span.set(tokens_estimated=True)
+        span.set(model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                 cost_usd=estimate_cost(model, prompt_tokens, completion_tokens))
+        span.end()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.end_span(run_id, error)
+
+    # Tools run through LangChain and retrievers
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self.start_span((serialized or {}).get('name') or 'tool', 'tool', run_id, parent_run_id,
+                        {'tool_input': str(input_str)[:500]}, active=True)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self.end_span(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.end_span(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get('name') or ((serialized or {}).get('id') or ['retriever'])[-1]
+        self.start_span(name, 'retriever', run_id, parent_run_id, {'query': str(query)[:200]}, active=True)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        with self._lock:
+            span = self._spans.get(run_id)
+            if span is not None:
+                span.set(documents=len(documents))
+        self.end_span(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self.end_span(run_id, error)
@@ -0,0 +1,76 @@
+'''
+Session-scoped workspaces for uploads and crew outputs.
+
+Each user session gets its own directory under output/workspaces/<workspace id>/, so concurrent
+users never overwrite each other's resumes, job descriptions or generated documents. Workspaces
+not used for longer than the TTL are removed by cleanup_workspaces().
+'''
+
+import os
+import re
+import shutil
+import time
+import uuid
+
+WORKSPACES_DIR = 'output/workspaces'
+WORKSPACE_TTL = float(os.getenv('JOBFUSION_WORKSPACE_TTL', 24 * 3600))  # seconds
+LAST_USED_FILE = '.last_used'
+
+
+class Workspace():
+    def __init__(self, workspace_id=None, root=WORKSPACES_DIR):
+        workspace_id = workspace_id or uuid.uuid4().hex
+        # Workspace IDs may come back from the URL, so only accept the IDs handed out here
+        if not re.fullmatch(r'[0-9a-f]{32}', workspace_id):
+            raise ValueError(f'Invalid workspace ID: {workspace_id}')
+        self.workspace_id = workspace_id
+        self.root = root
+        self.output_dir = os.path.join(root, workspace_id)
+        self.uploads_dir = os.path.join(self.output_dir, 'uploads')
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        self.touch()
+
+    def path(self, file_name):
+        '''
+        Path of a crew output file in this workspace, e.g. 'jd.txt'
+        '''
+        return os.path.join(self.output_dir, file_name)
+
+    def upload_path(self, file_name):
+        return os.path.join(self.uploads_dir, os.path.basename(file_name))
+
+    def save_upload(self, uploaded_file):
+        '''
+        Save a Streamlit UploadedFile into the workspace and return its path
+        '''
+        file_path = self.upload_path(uploaded_file.name)
+        with open(file_path, 'wb') as f:
+            f.write(uploaded_file.getbuffer())
+        return file_path
+
+    def touch(self):
+        '''
+        Mark the workspace as in use, which restarts its TTL
+        '''
+        with open(os.path.join(self.output_dir, LAST_USED_FILE), 'w') as f:
+            f.write(str(time.time()))
+
+
+def cleanup_workspaces(root=WORKSPACES_DIR, ttl=WORKSPACE_TTL):
+    '''
+    Remove workspaces that have not been used for longer than ttl seconds; returns how many were removed
+    '''
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    now = time.time()
+    for workspace_id in os.listdir(root):
+        workspace_dir = os.path.join(root, workspace_id)
+        last_used_path = os.path.join(workspace_dir, LAST_USED_FILE)
+        last_used = os.path.getmtime(last_used_path if os.path.exists(last_used_path) else workspace_dir)
+        if now - last_used > ttl:
+            shutil.rmtree(workspace_dir, ignore_errors=True)
+            removed += 1
+    if removed:
+        print(f'Removed {removed} expired workspaces from {root}')
+    return removed